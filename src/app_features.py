@@ -10,14 +10,25 @@ Each endpoint assembles prompts, calls retriever + LLM, verifies citations,
 logs requests, and returns JSON responses with provenance and disclaimers.
 """
 
+import asyncio
+from datetime import datetime
+import importlib.util
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict
+import orjson
 import uvicorn
 
 from src.config import Config
 from src.retriever import get_retriever
+from src.types_ import RetrievedBatch, index_version
 from src.llm_client import get_llm_client
+from src.embeddings_ import get_embedding_model, get_batching_embedder
+from src.semantic_cache import get_semantic_cache
 from src.prompt_templates import (
     build_research_prompt,
     build_judgment_prompt,
@@ -26,18 +37,75 @@ from src.prompt_templates import (
 from src.verify_and_log import (
     verify_bracket_citations,
     create_log_entry,
-    write_log_file,
+    snippet,
     should_retry_generation,
     build_retry_prompt
 )
+from src.log_writer import get_log_writer
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # Optional; responses are gzip-compressed without it
+    BrotliMiddleware = None
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson instead of the stdlib encoder."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the embedding model, retriever, and LLM client before serving traffic."""
+    def load_embeddings():
+        # Run one encode so lazy initialization inside the model happens now
+        get_embedding_model().embed_query("warmup")
+        get_batching_embedder()
+        get_semantic_cache()
+    
+    # Compile (or load from numba's cache) the citation validator now rather
+    # than on the first request that verifies citations
+    verify_bracket_citations("[1]", 1)
+    
+    # A missing model download, collection, or API key should not keep the
+    # server from starting; the endpoints will surface the error on first use
+    loaders = (
+        ("embedding model", load_embeddings),
+        ("retriever", get_retriever),
+        ("LLM client", get_llm_client)
+    )
+    for name, loader in loaders:
+        try:
+            loader()
+        except Exception as e:
+            print(f"WARNING: Could not initialize {name} at startup: {e}")
+    
+    loop = asyncio.get_running_loop()
+    print(f"Event loop: {type(loop).__module__}.{type(loop).__name__}")
+    
+    yield
+    
+    # Let queued audit log entries reach disk before shutting down
+    await get_log_writer().flush()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Legal Assistant RAG Chatbot",
     description="Legal RAG chatbot for Indian law",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Compress JSON responses of 1 KB and up; Brotli for clients that accept
+# it (falling back to gzip for the rest) when brotli-asgi is installed
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=1024, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 # Request models
 class ResearchRequest(BaseModel):
@@ -62,6 +130,9 @@ class SummarizeRequest(BaseModel):
 
 
 # Response models
+# Endpoints return ORJSONResponse directly (inputs are already validated),
+# skipping response validation and encoding; this model only documents
+# the response schema in OpenAPI.
 class APIResponse(BaseModel):
     mode: str
     answer: str
@@ -71,6 +142,43 @@ class APIResponse(BaseModel):
     disclaimer: Optional[str] = None
 
 
+async def _cached_response(cached: Dict, mode: str, user_input: str, temperature: float) -> ORJSONResponse:
+    """
+    Log a semantic-cache hit and return the cached response for this request.
+    
+    The hit gets its own audit log entry (with this request's input) and the
+    response points at that entry's logfile instead of the original one.
+    
+    Args:
+        cached: Cached response dict
+        mode: Request mode (research/judgment/summarize)
+        user_input: This request's query or facts
+        temperature: Generation temperature
+    
+    Returns:
+        ORJSONResponse with a copy of the cached response
+    """
+    now = datetime.now()
+    log_entry = create_log_entry(
+        mode=mode,
+        user_input=user_input,
+        retrieved=RetrievedBatch.empty(),
+        prompt="",
+        llm_response=cached["answer"],
+        verification=cached["verification"] or {},
+        temperature=temperature,
+        now=now,
+        cache_hit=True
+    )
+    # The cached response keeps only passage metadata, not IDs or distances
+    log_entry["retrieved_count"] = len(cached["retrieved"] or [])
+    log_entry["retrieved_metadata"] = [item["metadata"] for item in cached["retrieved"] or []]
+    log_entry["cached_logfile"] = cached["logfile"]
+    logfile = await get_log_writer().enqueue(log_entry, mode, now)
+    
+    return ORJSONResponse({**cached, "logfile": str(logfile)})
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -82,7 +190,7 @@ async def root():
     }
 
 
-@app.post("/research", response_model=APIResponse)
+@app.post("/research", responses={200: {"model": APIResponse}})
 async def research(request: ResearchRequest):
     """Legal research assistant endpoint."""
     try:
@@ -90,9 +198,20 @@ async def research(request: ResearchRequest):
         top_k = request.top_k or Config.DEFAULT_TOP_K
         temperature = request.temperature if request.temperature is not None else Config.RESEARCH_TEMPERATURE
         
+        # Serve near-duplicate queries from the semantic cache; the index
+        # version keeps answers built on an older index from being reused
+        query_embedding = await get_batching_embedder().embed_query(request.q)
+        cache = get_semantic_cache()
+        cache_namespace = ("research", top_k, temperature, index_version())
+        cached = cache.lookup(query_embedding, cache_namespace)
+        if cached is not None:
+            return await _cached_response(cached, "research", request.q, temperature)
+        
         # Retrieve documents
         retriever = get_retriever()
-        retrieved = retriever.retrieve(request.q, top_k=top_k)
+        retrieved = await run_in_threadpool(
+            retriever.retrieve_cached, request.q, top_k=top_k, query_embedding=query_embedding
+        )
         
         if not retrieved:
             raise HTTPException(status_code=404, detail="No relevant documents found")
@@ -102,7 +221,7 @@ async def research(request: ResearchRequest):
         
         # Generate response
         llm_client = get_llm_client()
-        result = llm_client.generate(prompt, temperature=temperature)
+        result = await run_in_threadpool(llm_client.generate, prompt, temperature=temperature)
         answer = result["text"]
         
         # Verify citations
@@ -111,11 +230,12 @@ async def research(request: ResearchRequest):
         # Retry if invalid citations found
         if should_retry_generation(verification):
             retry_prompt = build_retry_prompt(prompt, len(retrieved), verification["invalid"])
-            result = llm_client.generate(retry_prompt, temperature=temperature)
+            result = await run_in_threadpool(llm_client.generate, retry_prompt, temperature=temperature)
             answer = result["text"]
             verification = verify_bracket_citations(answer, len(retrieved))
         
-        # Log request
+        # Log request (queued; written in batches)
+        now = datetime.now()
         log_entry = create_log_entry(
             mode="research",
             user_input=request.q,
@@ -123,24 +243,29 @@ async def research(request: ResearchRequest):
             prompt=prompt,
             llm_response=answer,
             verification=verification,
-            temperature=temperature
+            temperature=temperature,
+            now=now
         )
-        logfile = write_log_file(log_entry, "research")
+        logfile = await get_log_writer().enqueue(log_entry, "research", now)
         
-        return APIResponse(
-            mode="research",
-            answer=answer,
-            retrieved=[{"metadata": doc["metadata"]} for doc in retrieved],
-            verification=verification,
-            logfile=str(logfile),
-            disclaimer="For research/educational use only."
-        )
+        response = {
+            "mode": "research",
+            "answer": answer,
+            "retrieved": [{"metadata": meta} for meta in retrieved.metadatas],
+            "verification": verification,
+            "logfile": str(logfile),
+            "disclaimer": "For research/educational use only."
+        }
+        if "error" not in result["raw_response"]:
+            cache.add(query_embedding, response, cache_namespace)
+        
+        return ORJSONResponse(response)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/judgment", response_model=APIResponse)
+@app.post("/judgment", responses={200: {"model": APIResponse}})
 async def judgment(request: JudgmentRequest):
     """Judgment simulation/reference endpoint."""
     try:
@@ -152,9 +277,19 @@ async def judgment(request: JudgmentRequest):
         top_k = request.top_k or Config.DEFAULT_TOP_K
         temperature = request.temperature if request.temperature is not None else Config.JUDGMENT_TEMPERATURE
         
+        # Serve near-duplicate facts from the semantic cache
+        query_embedding = await get_batching_embedder().embed_query(request.facts)
+        cache = get_semantic_cache()
+        cache_namespace = ("judgment", request.mode, top_k, temperature, index_version())
+        cached = cache.lookup(query_embedding, cache_namespace)
+        if cached is not None:
+            return await _cached_response(cached, "judgment", request.facts, temperature)
+        
         # Retrieve documents
         retriever = get_retriever()
-        retrieved = retriever.retrieve(request.facts, top_k=top_k)
+        retrieved = await run_in_threadpool(
+            retriever.retrieve_cached, request.facts, top_k=top_k, query_embedding=query_embedding
+        )
         
         if not retrieved:
             raise HTTPException(status_code=404, detail="No relevant documents found")
@@ -164,7 +299,7 @@ async def judgment(request: JudgmentRequest):
         
         # Generate response
         llm_client = get_llm_client()
-        result = llm_client.generate(prompt, temperature=temperature)
+        result = await run_in_threadpool(llm_client.generate, prompt, temperature=temperature)
         answer = result["text"]
         
         # Verify citations
@@ -173,11 +308,12 @@ async def judgment(request: JudgmentRequest):
         # Retry if invalid citations found
         if should_retry_generation(verification):
             retry_prompt = build_retry_prompt(prompt, len(retrieved), verification["invalid"])
-            result = llm_client.generate(retry_prompt, temperature=temperature)
+            result = await run_in_threadpool(llm_client.generate, retry_prompt, temperature=temperature)
             answer = result["text"]
             verification = verify_bracket_citations(answer, len(retrieved))
         
-        # Log request
+        # Log request (queued; written in batches)
+        now = datetime.now()
         log_entry = create_log_entry(
             mode="judgment",
             user_input=request.facts,
@@ -185,26 +321,31 @@ async def judgment(request: JudgmentRequest):
             prompt=prompt,
             llm_response=answer,
             verification=verification,
-            temperature=temperature
+            temperature=temperature,
+            now=now
         )
-        logfile = write_log_file(log_entry, "judgment")
+        logfile = await get_log_writer().enqueue(log_entry, "judgment", now)
         
         disclaimer = "HYPOTHETICAL ANALYSIS — NOT LEGAL ADVICE" if request.mode == "hypothetical" else "REFERENCE ANALYSIS — NOT LEGAL ADVICE"
         
-        return APIResponse(
-            mode="judgment",
-            answer=answer,
-            retrieved=[{"metadata": doc["metadata"]} for doc in retrieved],
-            verification=verification,
-            logfile=str(logfile),
-            disclaimer=disclaimer
-        )
+        response = {
+            "mode": "judgment",
+            "answer": answer,
+            "retrieved": [{"metadata": meta} for meta in retrieved.metadatas],
+            "verification": verification,
+            "logfile": str(logfile),
+            "disclaimer": disclaimer
+        }
+        if "error" not in result["raw_response"]:
+            cache.add(query_embedding, response, cache_namespace)
+        
+        return ORJSONResponse(response)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/summarize", response_model=APIResponse)
+@app.post("/summarize", responses={200: {"model": APIResponse}})
 async def summarize(request: SummarizeRequest):
     """Summarization/headnote generation endpoint."""
     try:
@@ -212,15 +353,26 @@ async def summarize(request: SummarizeRequest):
         top_k = request.top_k or 3
         temperature = request.temperature if request.temperature is not None else Config.SUMMARIZE_TEMPERATURE
         
-        retrieved = []
+        retrieved = RetrievedBatch.empty()
+        query_embedding = None
         
         # Either use case_text or retrieve by query
         if not request.case_text and not request.query:
             raise HTTPException(status_code=400, detail="Either 'query' or 'case_text' must be provided")
         
         if request.query and not request.case_text:
+            # Serve near-duplicate queries from the semantic cache
+            query_embedding = await get_batching_embedder().embed_query(request.query)
+            cache = get_semantic_cache()
+            cache_namespace = ("summarize", top_k, temperature, index_version())
+            cached = cache.lookup(query_embedding, cache_namespace)
+            if cached is not None:
+                return await _cached_response(cached, "summarize", request.query, temperature)
+            
             retriever = get_retriever()
-            retrieved = retriever.retrieve(request.query, top_k=top_k)
+            retrieved = await run_in_threadpool(
+                retriever.retrieve_cached, request.query, top_k=top_k, query_embedding=query_embedding
+            )
             
             if not retrieved:
                 raise HTTPException(status_code=404, detail="No relevant documents found")
@@ -230,31 +382,49 @@ async def summarize(request: SummarizeRequest):
         
         # Generate response
         llm_client = get_llm_client()
-        result = llm_client.generate(prompt, temperature=temperature)
+        result = await run_in_threadpool(llm_client.generate, prompt, temperature=temperature)
         answer = result["text"]
         
-        # Log request
+        # Log request (queued; written in batches)
+        now = datetime.now()
         log_entry = create_log_entry(
             mode="summarize",
-            user_input=request.query or request.case_text[:500],
+            user_input=request.query or snippet(request.case_text, 500),
             retrieved=retrieved,
             prompt=prompt,
             llm_response=answer,
             verification={},
-            temperature=temperature
+            temperature=temperature,
+            now=now
         )
-        logfile = write_log_file(log_entry, "summarize")
+        logfile = await get_log_writer().enqueue(log_entry, "summarize", now)
         
-        return APIResponse(
-            mode="summarize",
-            answer=answer,
-            retrieved=[{"metadata": doc["metadata"]} for doc in retrieved] if retrieved else None,
-            logfile=str(logfile)
-        )
+        response = {
+            "mode": "summarize",
+            "answer": answer,
+            "retrieved": [{"metadata": meta} for meta in retrieved.metadatas] if retrieved else None,
+            "verification": None,
+            "logfile": str(logfile),
+            "disclaimer": None
+        }
+        # Only query-based summaries are cached; pasted case text is not embedded
+        if query_embedding is not None and "error" not in result["raw_response"]:
+            cache.add(query_embedding, response, cache_namespace)
+        
+        return ORJSONResponse(response)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host=Config.HOST, port=Config.PORT)
+    # uvloop is not available on Windows; fall back to the stdlib loop there
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    uvicorn.run(
+        app,
+        host=Config.HOST,
+        port=Config.PORT,
+        loop=loop,
+        http="httptools",
+        access_log=Config.ACCESS_LOG
+    )
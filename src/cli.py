@@ -5,6 +5,8 @@ Command Line Interface for Legal Assistant RAG Chatbot.
 import sys
 import asyncio
 import rich
+from contextlib import contextmanager
+from datetime import datetime
 from typing import Optional
 from rich.console import Console
 from rich.markdown import Markdown
@@ -15,7 +17,9 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from src.config import Config
 from src.retriever import get_retriever
+from src.types_ import RetrievedBatch
 from src.llm_client import get_llm_client
+from src.log_writer import get_log_writer
 from src.prompt_templates import (
     build_research_prompt,
     build_judgment_prompt,
@@ -24,13 +28,41 @@ from src.prompt_templates import (
 from src.verify_and_log import (
     verify_bracket_citations,
     create_log_entry,
-    write_log_file,
+    write_log_file_async,
+    snippet,
     should_retry_generation,
     build_retry_prompt
 )
 
 console = Console()
 
+# One progress display shared by all handlers. It is only live while a
+# request runs: a live display redraws the current line and hides the
+# cursor, which would erase prompts and the user's typing.
+_progress = Progress(
+    SpinnerColumn(),
+    TextColumn("[progress.description]{task.description}"),
+    console=console,
+    transient=True,
+)
+
+@contextmanager
+def _progress_task(description: str):
+    """Show a spinner task on the shared progress display while the block runs."""
+    task = _progress.add_task(description=description, total=None)
+    _progress.start()
+    try:
+        yield task
+    finally:
+        _progress.stop()
+        _progress.remove_task(task)
+
+async def _write_log(log_entry: dict, mode: str, now: datetime):
+    """Write a request's log entry, batched like the API's unless per-request files are enabled."""
+    if Config.LOG_PER_REQUEST_FILES:
+        return await write_log_file_async(log_entry, mode, now=now)
+    return await get_log_writer().enqueue(log_entry, mode, now)
+
 def print_header():
     console.print(Panel.fit(
         "[bold blue]Legal Assistant RAG Chatbot[/bold blue]\n[italic]AI Legal Assistant for Indian Law[/italic]",
@@ -51,37 +83,32 @@ async def handle_research():
     if not query:
         return
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        transient=True,
-    ) as progress:
-        task = progress.add_task(description="Retrieving documents...", total=None)
+    with _progress_task("Retrieving documents...") as task:
         
         # Retrieve
         retriever = get_retriever()
-        retrieved = retriever.retrieve(query, top_k=Config.DEFAULT_TOP_K)
+        retrieved = await asyncio.to_thread(retriever.retrieve_cached, query, top_k=Config.DEFAULT_TOP_K)
         
         if not retrieved:
             console.print("[red]No relevant documents found.[/red]")
             return
 
-        progress.update(task, description="Generating answer...")
+        _progress.update(task, description="Generating answer...")
         
         # Generate
         prompt = build_research_prompt(query, retrieved)
         llm_client = get_llm_client()
-        result = llm_client.generate(prompt, temperature=Config.RESEARCH_TEMPERATURE)
+        result = await asyncio.to_thread(llm_client.generate, prompt, temperature=Config.RESEARCH_TEMPERATURE)
         answer = result["text"]
         
         # Verify
-        progress.update(task, description="Verifying citations...")
+        _progress.update(task, description="Verifying citations...")
         verification = verify_bracket_citations(answer, len(retrieved))
         
         if should_retry_generation(verification):
-            progress.update(task, description="Refining answer based on verification...")
+            _progress.update(task, description="Refining answer based on verification...")
             retry_prompt = build_retry_prompt(prompt, len(retrieved), verification["invalid"])
-            result = llm_client.generate(retry_prompt, temperature=Config.RESEARCH_TEMPERATURE)
+            result = await asyncio.to_thread(llm_client.generate, retry_prompt, temperature=Config.RESEARCH_TEMPERATURE)
             answer = result["text"]
             verification = verify_bracket_citations(answer, len(retrieved))
 
@@ -96,8 +123,7 @@ async def handle_research():
     table.add_column("Case/Act", style="cyan")
     table.add_column("Citation/Section")
     
-    for i, doc in enumerate(retrieved, 1):
-        meta = doc["metadata"]
+    for i, meta in enumerate(retrieved.metadatas, 1):
         name = meta.get("case_name") or meta.get("act_name") or "Unknown"
         citation = meta.get("citation") or f"Section {meta.get('section', '?')}"
         table.add_row(str(i), name, str(citation))
@@ -105,6 +131,7 @@ async def handle_research():
     console.print(table)
     
     # Log
+    now = datetime.now()
     log_entry = create_log_entry(
         mode="research",
         user_input=query,
@@ -112,9 +139,10 @@ async def handle_research():
         prompt=prompt,
         llm_response=answer,
         verification=verification,
-        temperature=Config.RESEARCH_TEMPERATURE
+        temperature=Config.RESEARCH_TEMPERATURE,
+        now=now
     )
-    logfile = write_log_file(log_entry, "research")
+    logfile = await _write_log(log_entry, "research", now)
     console.print(f"\n[dim]Log saved to: {logfile}[/dim]")
 
 async def handle_judgment():
@@ -123,25 +151,20 @@ async def handle_judgment():
     mode_choice = Prompt.ask("Type (h)ypothetical or (r)eference", choices=["h", "r"], default="h")
     mode = "hypothetical" if mode_choice == "h" else "reference"
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        transient=True,
-    ) as progress:
-        task = progress.add_task(description="Retrieving precedents...", total=None)
+    with _progress_task("Retrieving precedents...") as task:
         
         retriever = get_retriever()
-        retrieved = retriever.retrieve(facts, top_k=Config.DEFAULT_TOP_K)
+        retrieved = await asyncio.to_thread(retriever.retrieve_cached, facts, top_k=Config.DEFAULT_TOP_K)
         
         if not retrieved:
             console.print("[red]No relevant documents found.[/red]")
             return
 
-        progress.update(task, description="Drafting judgment analysis...")
+        _progress.update(task, description="Drafting judgment analysis...")
         
         prompt = build_judgment_prompt(facts, mode, retrieved)
         llm_client = get_llm_client()
-        result = llm_client.generate(prompt, temperature=Config.JUDGMENT_TEMPERATURE)
+        result = await asyncio.to_thread(llm_client.generate, prompt, temperature=Config.JUDGMENT_TEMPERATURE)
         answer = result["text"]
         
         # Verify
@@ -154,6 +177,7 @@ async def handle_judgment():
         console.print("\n[bold red]DISCLAIMER: HYPOTHETICAL ANALYSIS — NOT LEGAL ADVICE[/bold red]")
     
     # Log
+    now = datetime.now()
     log_entry = create_log_entry(
         mode="judgment",
         user_input=facts,
@@ -161,9 +185,10 @@ async def handle_judgment():
         prompt=prompt,
         llm_response=answer,
         verification=verification,
-        temperature=Config.JUDGMENT_TEMPERATURE
+        temperature=Config.JUDGMENT_TEMPERATURE,
+        now=now
     )
-    write_log_file(log_entry, "judgment")
+    await _write_log(log_entry, "judgment", now)
 
 async def handle_summarize():
     console.print("\n[bold cyan]-- Summarize Mode --[/bold cyan]")
@@ -171,42 +196,47 @@ async def handle_summarize():
     
     query = None
     case_text = None
-    retrieved = []
+    retrieved = RetrievedBatch.empty()
     
     if choice == "q":
         query = Prompt.ask("Enter topic to summarize")
-        with Progress(SpinnerColumn(), TextColumn("Retrieving..."), transient=True) as p:
-            p.add_task("", total=None)
+        with _progress_task("Retrieving..."):
             retriever = get_retriever()
-            retrieved = retriever.retrieve(query, top_k=3)
+            retrieved = await asyncio.to_thread(retriever.retrieve_cached, query, top_k=3)
     else:
         case_text = Prompt.ask("Paste text to summarize")
 
-    with Progress(SpinnerColumn(), TextColumn("Generating summary..."), transient=True) as p:
-        p.add_task("", total=None)
+    with _progress_task("Generating summary..."):
         prompt = build_summarize_prompt(query or "", retrieved, case_text)
         llm_client = get_llm_client()
-        result = llm_client.generate(prompt, temperature=Config.SUMMARIZE_TEMPERATURE)
+        result = await asyncio.to_thread(llm_client.generate, prompt, temperature=Config.SUMMARIZE_TEMPERATURE)
         answer = result["text"]
 
     console.print("\n[bold green]Summary:[/bold green]")
     console.print(Markdown(answer))
     
     # Log
+    now = datetime.now()
     log_entry = create_log_entry(
         mode="summarize",
-        user_input=query or case_text[:100],
+        user_input=query or snippet(case_text, 100),
         retrieved=retrieved,
         prompt=prompt,
         llm_response=answer,
         verification={},
-        temperature=Config.SUMMARIZE_TEMPERATURE
+        temperature=Config.SUMMARIZE_TEMPERATURE,
+        now=now
     )
-    write_log_file(log_entry, "summarize")
+    await _write_log(log_entry, "summarize", now)
 
 async def main():
     print_header()
-    
+    try:
+        await run_menu()
+    finally:
+        await get_log_writer().flush()
+
+async def run_menu():
     while True:
         display_menu()
         choice = Prompt.ask("Choice", choices=["1", "2", "3", "4"])
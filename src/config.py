@@ -24,20 +24,66 @@ class Config:
     # ChromaDB Configuration
     CHROMA_DB_DIR: str = os.getenv("CHROMA_DB_DIR", "./chroma_db")
     CHROMA_COLLECTION_NAME: str = "legal_judgments"
+    # Chunk embeddings cached across ingestion runs, keyed by SHA1 of the text
+    CHUNK_EMBED_CACHE_PATH: str = os.getenv(
+        "CHUNK_EMBED_CACHE_PATH",
+        os.path.join(CHROMA_DB_DIR, "chunk_embeddings.sqlite3")
+    )
+    # PDFs already ingested, keyed by SHA1 of the file, skipped on later runs
+    INGEST_INDEX_PATH: str = os.getenv(
+        "INGEST_INDEX_PATH",
+        os.path.join(CHROMA_DB_DIR, "ingest_index.sqlite3")
+    )
+    # Counter bumped by ingestion after every upsert; caches of retrieval
+    # results in any process are keyed by it
+    INDEX_VERSION_PATH: str = os.getenv(
+        "INDEX_VERSION_PATH",
+        os.path.join(CHROMA_DB_DIR, "index_version")
+    )
     
     # Embedding Model Configuration
     EMBEDDING_MODEL: str = os.getenv(
         "EMBEDDING_MODEL", 
         "sentence-transformers/all-MiniLM-L6-v2"
     )
+    # Run the embedding model with float16 weights (mainly useful on GPU).
+    # Only halves each process's own copy; weights are not shared across workers
+    EMBED_FP16: bool = os.getenv("EMBED_FP16", "false").lower() == "true"
+    # Exact-text embedding cache entries (0 disables)
+    EMBED_CACHE_SIZE: int = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+    # Query embedding micro-batching (API only)
+    EMBED_QUEUE_FLUSH_MS: float = float(os.getenv("EMBED_QUEUE_FLUSH_MS", "5"))
+    EMBED_BATCH_MAX: int = int(os.getenv("EMBED_BATCH_MAX", "32"))
+    # Store in-memory (semantic cache) embeddings as int8 instead of float32.
+    # Saves memory only: int8 rows are upcast for scoring, so lookups are not faster
+    EMBED_QUANTIZE: bool = os.getenv("EMBED_QUANTIZE", "false").lower() == "true"
     
     # Chunking Configuration
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "800"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "160"))
     
+    # Ingestion Configuration
+    # Worker processes for PDF extraction and chunking
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", str(min(os.cpu_count() or 1, 8))))
+    # Worker processes for OCR of scanned pages within one PDF
+    OCR_WORKERS: int = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+    # Pages with less native text than this are OCRed if they contain images
+    OCR_MIN_CHARS: int = int(os.getenv("OCR_MIN_CHARS", "50"))
+    OCR_DPI: int = int(os.getenv("OCR_DPI", "200"))
+    # PDFs with less text than this in their first 3 pages (and no scans) are skipped
+    MIN_USEFUL_CHARS: int = int(os.getenv("MIN_USEFUL_CHARS", "100"))
+    # Chunks embedded together across PDFs; a batch is also embedded once
+    # its texts reach EMBED_BATCH_MAX_CHARS characters
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+    EMBED_BATCH_MAX_CHARS: int = int(os.getenv("EMBED_BATCH_MAX_CHARS", "150000"))
+    # Chunks per ChromaDB upsert (50-250 works well)
+    UPSERT_BATCH_SIZE: int = int(os.getenv("UPSERT_BATCH_SIZE", "200"))
+    
     # Server Configuration
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
+    # uvicorn's per-request access log (every API request is also audit-logged)
+    ACCESS_LOG: bool = os.getenv("ACCESS_LOG", "true").lower() == "true"
     
     # Project Paths
     PROJECT_ROOT: Path = Path(__file__).parent.parent
@@ -46,10 +92,39 @@ class Config:
     ACTS_DIR: Path = DATA_DIR / "acts"
     JUDGMENTS_DIR: Path = DATA_DIR / "judgments"
     LOGS_DIR: Path = PROJECT_ROOT / "logs"
+    # Write CLI logs as one file per request (for debugging) instead of
+    # appending them to the batched daily NDJSON files like the API
+    LOG_PER_REQUEST_FILES: bool = os.getenv("LOG_PER_REQUEST_FILES", "false").lower() == "true"
+    # Format of per-request log files: "json" or "msgpack"
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json").lower()
+    # On-disk cache of deterministic (temperature 0) LLM responses; empty disables
+    LLM_CACHE_DIR: str = os.getenv("LLM_CACHE_DIR", str(PROJECT_ROOT / "llm_cache"))
+    
+    # Audit Log Batching
+    LOG_FLUSH_MS: float = float(os.getenv("LOG_FLUSH_MS", "100"))
+    LOG_BATCH_MAX: int = int(os.getenv("LOG_BATCH_MAX", "64"))
+    # Entries waiting to be written before new requests wait for the disk
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Append audit logs to one binary write-ahead log (logs/audit.wal) instead
+    # of daily NDJSON files, syncing once per LOG_COMMIT_MS (needs msgpack)
+    LOG_WAL: bool = os.getenv("LOG_WAL", "false").lower() == "true"
+    LOG_COMMIT_MS: float = float(os.getenv("LOG_COMMIT_MS", "20"))
     
     # Retrieval Configuration
     DEFAULT_TOP_K: int = 6
     RERANK_TOP_K: int = 50
+    # Retrieval results reused for queries whose embeddings share an LSH signature
+    RETRIEVAL_CACHE_SIZE: int = int(os.getenv("RETRIEVAL_CACHE_SIZE", "2048"))
+    RETRIEVAL_SIGNATURE_BITS: int = int(os.getenv("RETRIEVAL_SIGNATURE_BITS", "64"))
+    
+    # Semantic Cache Configuration
+    SEMANTIC_CACHE_TAU: float = float(os.getenv("SEMANTIC_CACHE_TAU", "0.95"))
+    SEMANTIC_CACHE_SIZE: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+    SEMANTIC_CACHE_TTL: float = float(os.getenv("SEMANTIC_CACHE_TTL", "300"))
+    LSH_NUM_TABLES: int = int(os.getenv("LSH_NUM_TABLES", "8"))
+    LSH_BITS: int = int(os.getenv("LSH_BITS", "12"))
+    # Below this many cached entries lookups scan every vector exactly
+    LSH_MIN_ENTRIES: int = int(os.getenv("LSH_MIN_ENTRIES", "10000"))
     
     # Generation Configuration
     RESEARCH_TEMPERATURE: float = 0.0
@@ -60,7 +135,7 @@ class Config:
     # Download Configuration
     DOWNLOAD_DELAY: float = 1.0  # seconds between requests
     USER_AGENT: str = "legal-assistant-rag/1.0 (Educational Research Tool)"
-    MAX_RETRIES: int = 3
+    MAX_RETRIES: int = 3  # also used for LLM API calls
     
     @classmethod
     def validate(cls) -> bool:
@@ -6,7 +6,12 @@ Provides a simple interface to load the model and generate embeddings
 for text chunks during ingestion and query time.
 """
 
-from typing import List
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from src.config import Config
 
@@ -25,9 +30,19 @@ class EmbeddingModel:
         self.model_name = model_name or Config.EMBEDDING_MODEL
         print(f"Loading embedding model: {self.model_name}")
         self.model = SentenceTransformer(self.model_name)
+        if Config.EMBED_FP16:
+            # Half the weight bytes read per forward pass; outputs are
+            # still converted to float32 below
+            self.model.half()
         print(f"Embedding model loaded successfully. Dimension: {self.model.get_sentence_embedding_dimension()}")
+        
+        # Exact-text embedding cache keyed by blake2b digest, so long texts
+        # are not kept alive as keys
+        self.cache_size = Config.EMBED_CACHE_SIZE
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
-    def embed_texts(self, texts: List[str], batch_size: int = 32, show_progress: bool = True) -> List[List[float]]:
+    def embed_texts(self, texts: List[str], batch_size: int = 32, show_progress: bool = True) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
         
@@ -37,33 +52,71 @@ class EmbeddingModel:
             show_progress: Whether to show progress bar
         
         Returns:
-            List of embedding vectors (each vector is a list of floats)
+            L2-normalized float32 array of shape (len(texts), dimension).
+            Call .tolist() at the ChromaDB boundary.
         """
+        embeddings = np.empty((len(texts), self.get_dimension()), dtype=np.float32)
         if not texts:
-            return []
+            return embeddings
+        
+        # Fill rows from the cache and collect the texts that still need encoding
+        keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+        missing = []
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    embeddings[i] = cached
+                    self._cache.move_to_end(key)
         
-        embeddings = self.model.encode(
-            texts,
+        if not missing:
+            return embeddings
+        
+        encoded = self.model.encode(
+            [texts[i] for i in missing],
             batch_size=batch_size,
             show_progress_bar=show_progress,
-            convert_to_numpy=True
-        )
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+        embeddings[missing] = encoded
+        
+        if self.cache_size > 0:
+            with self._cache_lock:
+                for i, vector in zip(missing, encoded):
+                    self._cache[keys[i]] = vector.copy()
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
         
-        # Convert numpy arrays to lists for ChromaDB compatibility
-        return embeddings.tolist()
+        return embeddings
     
-    def embed_query(self, query: str) -> List[float]:
+    def embed_query(self, query: str) -> np.ndarray:
         """
         Generate embedding for a single query string.
         
+        Repeated queries are served from the exact-text cache.
+        
+        Args:
+            query: Query text to embed
+        
+        Returns:
+            L2-normalized float32 embedding vector
+        """
+        return self.embed_texts([query], show_progress=False)[0]
+    
+    def embed_query_list(self, query: str) -> List[float]:
+        """
+        Generate embedding for a query as a list of floats.
+        
         Args:
             query: Query text to embed
         
         Returns:
-            Embedding vector as a list of floats
+            Embedding vector as a list of floats (for ChromaDB)
         """
-        embedding = self.model.encode(query, convert_to_numpy=True)
-        return embedding.tolist()
+        return self.embed_query(query).tolist()
     
     def get_dimension(self) -> int:
         """
@@ -77,22 +130,27 @@ class EmbeddingModel:
 
 # Global instance for reuse
 _embedding_model_instance = None
+_embedding_model_lock = threading.Lock()
 
 
 def get_embedding_model() -> EmbeddingModel:
     """
     Get or create the global embedding model instance.
     
+    Safe to call from concurrent threads; the model is loaded only once.
+    
     Returns:
         EmbeddingModel instance
     """
     global _embedding_model_instance
     if _embedding_model_instance is None:
-        _embedding_model_instance = EmbeddingModel()
+        with _embedding_model_lock:
+            if _embedding_model_instance is None:
+                _embedding_model_instance = EmbeddingModel()
     return _embedding_model_instance
 
 
-def embed_texts(texts: List[str], batch_size: int = 32) -> List[List[float]]:
+def embed_texts(texts: List[str], batch_size: int = 32) -> np.ndarray:
     """
     Convenience function to embed texts using the global model instance.
     
@@ -101,13 +159,13 @@ def embed_texts(texts: List[str], batch_size: int = 32) -> List[List[float]]:
         batch_size: Batch size for encoding
     
     Returns:
-        List of embedding vectors
+        Array of embedding vectors, one row per text
     """
     model = get_embedding_model()
     return model.embed_texts(texts, batch_size=batch_size)
 
 
-def embed_query(query: str) -> List[float]:
+def embed_query(query: str) -> np.ndarray:
     """
     Convenience function to embed a query using the global model instance.
     
@@ -115,7 +173,119 @@ def embed_query(query: str) -> List[float]:
         query: Query text to embed
     
     Returns:
-        Embedding vector
+        Normalized float32 embedding vector
     """
     model = get_embedding_model()
     return model.embed_query(query)
+
+
+def embed_query_list(query: str) -> List[float]:
+    """
+    Convenience function to embed a query as a list of floats.
+    
+    Args:
+        query: Query text to embed
+    
+    Returns:
+        Embedding vector as a list of floats
+    """
+    model = get_embedding_model()
+    return model.embed_query_list(query)
+
+
+class BatchingEmbedder:
+    """
+    Coalesces concurrent query embeddings into batched forward passes.
+    
+    Queries awaiting embed_query() within Config.EMBED_QUEUE_FLUSH_MS of each
+    other (up to Config.EMBED_BATCH_MAX) are encoded in a single model call.
+    """
+    
+    def __init__(self, model: Optional[EmbeddingModel] = None, flush_ms: float = None, batch_max: int = None):
+        """
+        Initialize the batching embedder.
+        
+        Args:
+            model: Embedding model to use. Defaults to the global instance.
+            flush_ms: Time to wait for more queries after the first arrives.
+                      Defaults to Config.EMBED_QUEUE_FLUSH_MS.
+            batch_max: Maximum queries per batch. Defaults to Config.EMBED_BATCH_MAX.
+        """
+        self.model = model or get_embedding_model()
+        self.flush_ms = Config.EMBED_QUEUE_FLUSH_MS if flush_ms is None else flush_ms
+        self.batch_max = Config.EMBED_BATCH_MAX if batch_max is None else batch_max
+        
+        self._loop = None
+        self._queue = None
+        self._worker = None
+    
+    def _ensure_worker(self) -> None:
+        """Start the batching task on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+    
+    async def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a query, batched with any other queries arriving concurrently.
+        
+        Args:
+            query: Query text to embed
+        
+        Returns:
+            Normalized float32 embedding vector
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((query, future))
+        return await future
+    
+    async def _run(self) -> None:
+        """Collect queued queries into batches and encode them off the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_ms / 1000
+            
+            while len(batch) < self.batch_max:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            queries = [query for query, _ in batch]
+            try:
+                embeddings = await asyncio.to_thread(
+                    self.model.embed_texts, queries, batch_size=len(queries), show_progress=False
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+
+# Global batching instance for async callers
+_batching_embedder_instance = None
+
+
+def get_batching_embedder() -> BatchingEmbedder:
+    """
+    Get or create the global batching embedder.
+    
+    Returns:
+        BatchingEmbedder wrapping the global embedding model
+    """
+    global _batching_embedder_instance
+    if _batching_embedder_instance is None:
+        _batching_embedder_instance = BatchingEmbedder()
+    return _batching_embedder_instance
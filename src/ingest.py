@@ -11,10 +11,19 @@ Orchestrates the complete ingestion process:
 7. Upsert to ChromaDB with full metadata
 """
 
+import os
 import json
+import multiprocessing
+import sqlite3
+import hashlib
+import itertools
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from tqdm import tqdm
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 
@@ -28,6 +37,265 @@ from src.utils import (
     chunk_text_with_metadata
 )
 from src.embeddings_ import get_embedding_model
+from src.types_ import bump_index_version
+
+# Upsert batches that may wait for the upsert thread before embedding blocks
+_UPSERT_QUEUE_SIZE = 4
+
+# Extractions submitted per worker before the directory walk waits for one
+# to finish; each finished extraction holds a whole PDF's chunks in memory
+_EXTRACTIONS_PER_WORKER = 2
+
+# tqdm's monitor thread would otherwise still be running when the next
+# directory's worker pool forks; it only adjusts refresh rates of stalled bars
+tqdm.monitor_interval = 0
+
+
+def _worker_context():
+    """
+    Get the multiprocessing context for extraction workers.
+    
+    Forked workers start in milliseconds instead of re-importing the
+    package like spawned ones. Forking after the embedding model has been
+    loaded (even on CUDA) is safe because workers never use it. The upsert
+    thread, whose ChromaDB and SQLite locks workers could inherit mid-use,
+    is stopped before each pool is created, and tqdm's monitor thread is
+    disabled.
+    
+    Returns:
+        The "fork" context where the platform supports it, otherwise None
+        (the platform default)
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def _init_worker() -> None:
+    """Configure an extraction worker process."""
+    # Tesseract's own OpenMP threads compete with the other worker processes
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    # Share the OCR process budget between the concurrent file workers
+    Config.OCR_WORKERS = max(1, Config.OCR_WORKERS // Config.INGEST_WORKERS)
+
+
+def _extract_and_chunk(
+    pdf_path: Path,
+    source_type: str = "judgment",
+    doc_key: Optional[str] = None
+) -> Tuple[List[str], List[Dict], List[str]]:
+    """
+    Extract, clean, and chunk a PDF into documents ready for embedding.
+    
+    Holds no ChromaDB or model handles, so it can run in a worker process.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        source_type: Type of document ("judgment", "act", etc.)
+        doc_key: Prefix of the chunk IDs, unique among the PDFs ingested
+            together (one upsert batch holds chunks of several PDFs).
+            Defaults to the file stem.
+    
+    Returns:
+        Tuple of (documents, metadatas, ids), empty if no text was extracted
+    """
+    print(f"\nProcessing: {pdf_path.name}")
+    
+    # Extract text
+    full_text, page_metadata = extract_text_from_pdf(pdf_path)
+    
+    if not full_text.strip():
+        print(f"  WARNING: No text extracted from {pdf_path.name}")
+        return [], [], []
+    
+    # Parse metadata
+    filename_meta = parse_filename_metadata(pdf_path.name)
+    content_meta = parse_case_metadata_from_text(full_text)
+    
+    # Clean text
+    cleaned_text = clean_text(full_text)
+    
+    # Chunk text
+    chunks = chunk_text_with_metadata(
+        cleaned_text,
+        Config.CHUNK_SIZE,
+        Config.CHUNK_OVERLAP,
+        page_metadata
+    )
+    
+    print(f"  Extracted {len(page_metadata)} pages, created {len(chunks)} chunks")
+    
+    # Prepare data for ChromaDB
+    documents = []
+    metadatas = []
+    ids = []
+    
+    for chunk in chunks:
+        # Create unique ID
+        chunk_id = f"{doc_key or pdf_path.stem}_{chunk['chunk_index']}"
+        
+        # Combine metadata
+        metadata = {
+            "source_file": pdf_path.name,
+            "source_type": source_type,
+            "page_number": chunk["page_number"],
+            "chunk_index": chunk["chunk_index"],
+            "case_name": content_meta.get("case_name"),
+            "court": filename_meta.get("court") or content_meta.get("bench"),
+            "judgment_date": content_meta.get("judgment_date"),
+            "citation": content_meta.get("citation"),
+            "year": filename_meta.get("year"),
+            "act_name": filename_meta.get("act_name"),
+            "url": None  # Can be populated from manifest
+        }
+        
+        # Remove None values
+        metadata = {k: v for k, v in metadata.items() if v is not None}
+        
+        documents.append(chunk["text"])
+        metadatas.append(metadata)
+        ids.append(chunk_id)
+    
+    return documents, metadatas, ids
+
+
+class ChunkEmbeddingCache:
+    """Persistent SQLite cache of chunk embeddings keyed by SHA1 of the chunk text."""
+    
+    # Keys per SELECT, below SQLite's default bound-parameter limit
+    _QUERY_BATCH = 500
+    
+    def __init__(self, path: str, model_name: str):
+        """
+        Open (or create) the cache.
+        
+        Args:
+            path: SQLite database file
+            model_name: Embedding model the cached vectors belong to
+        """
+        self.model_name = model_name
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, sha1 TEXT NOT NULL, embedding BLOB NOT NULL, "
+            "PRIMARY KEY (model, sha1))"
+        )
+        self.conn.commit()
+    
+    @staticmethod
+    def key(text: str) -> str:
+        """Cache key of a chunk text."""
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached embeddings.
+        
+        Args:
+            keys: Chunk keys
+        
+        Returns:
+            Dict of key -> float32 embedding for the keys that are cached
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), self._QUERY_BATCH):
+            batch = unique_keys[i:i + self._QUERY_BATCH]
+            rows = self.conn.execute(
+                f"SELECT sha1, embedding FROM embeddings WHERE model = ? AND sha1 IN ({','.join('?' * len(batch))})",
+                [self.model_name, *batch]
+            )
+            for sha1, blob in rows:
+                found[sha1] = np.frombuffer(blob, dtype=np.float32)
+        return found
+    
+    def put_many(self, embeddings: Dict[str, np.ndarray]) -> None:
+        """
+        Store embeddings.
+        
+        Args:
+            embeddings: Dict of key -> embedding
+        """
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, sha1, embedding) VALUES (?, ?, ?)",
+            [
+                (self.model_name, key, np.asarray(vec, dtype=np.float32).tobytes())
+                for key, vec in embeddings.items()
+            ]
+        )
+        self.conn.commit()
+
+
+def _file_sha1(path: Path) -> str:
+    """SHA1 of a file's contents, read in 1 MB blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ProcessedFileIndex:
+    """Persistent SQLite index of PDFs already ingested, keyed by SHA1 of their bytes."""
+    
+    def __init__(self, path: str, settings: str):
+        """
+        Open (or create) the index.
+        
+        Args:
+            path: SQLite database file
+            settings: Ingestion settings (embedding model and chunking) the
+                PDFs are ingested with; PDFs ingested with other settings
+                count as not ingested
+        """
+        self.settings = settings
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Lookups run on the ingesting thread, writes on the upsert thread
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingested_files ("
+            "settings TEXT NOT NULL, sha1 TEXT NOT NULL, path TEXT NOT NULL, "
+            "chunk_count INTEGER NOT NULL, mtime REAL NOT NULL, "
+            "PRIMARY KEY (settings, sha1, path))"
+        )
+        self.conn.commit()
+    
+    def chunk_count(self, file_hash: str, pdf_path: Path) -> Optional[int]:
+        """
+        Get the chunk count of an already ingested PDF.
+        
+        Chunk IDs and metadata depend on the file name, so a copy of a
+        processed PDF under another name is not treated as processed.
+        
+        Args:
+            file_hash: SHA1 of the PDF's bytes
+            pdf_path: Path of the PDF
+        
+        Returns:
+            Number of chunks ingested for it, or None if it was not ingested
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT chunk_count FROM ingested_files WHERE settings = ? AND sha1 = ? AND path = ?",
+                (self.settings, file_hash, str(pdf_path))
+            ).fetchone()
+        return row[0] if row else None
+    
+    def mark_processed(self, entries: List[Tuple[str, str, int, float]]) -> None:
+        """
+        Record ingested PDFs.
+        
+        Args:
+            entries: (sha1, path, chunk_count, mtime) tuples
+        """
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO ingested_files (settings, sha1, path, chunk_count, mtime) VALUES (?, ?, ?, ?, ?)",
+                [(self.settings, *entry) for entry in entries]
+            )
+            self.conn.commit()
 
 
 class LegalDocumentIngestor:
@@ -52,6 +320,33 @@ class LegalDocumentIngestor:
         # Initialize embedding model
         self.embedding_model = get_embedding_model()
         
+        # Embeddings of chunk texts seen in earlier runs or other PDFs
+        self._embedding_cache = ChunkEmbeddingCache(Config.CHUNK_EMBED_CACHE_PATH, Config.EMBEDDING_MODEL)
+        
+        # Chunks waiting to be embedded together, and the PDFs they come from
+        self._unembedded = {"documents": [], "metadatas": [], "ids": []}
+        self._unembedded_files: List[Tuple[str, str, int, float]] = []
+        self._unembedded_chars = 0
+        
+        # Embedded chunks waiting to be upserted in one batch, and their PDFs
+        self._pending = {"documents": [], "metadatas": [], "embeddings": [], "ids": []}
+        self._pending_files: List[Tuple[str, str, int, float]] = []
+        
+        # Full batches handed to the upsert thread. The bound makes embedding
+        # wait when ChromaDB falls behind instead of buffering without limit.
+        self._upsert_queue = queue.Queue(maxsize=_UPSERT_QUEUE_SIZE)
+        self._upserter: Optional[threading.Thread] = None
+        # (sha1, path, chunk_count, mtime) of PDFs whose chunks the upsert
+        # thread has stored, in upsert order
+        self._upserted_files: List[Tuple[str, str, int, float]] = []
+        
+        # PDFs ingested by earlier runs, skipped while they and the settings
+        # that shape their chunks are unchanged
+        self._file_index = ProcessedFileIndex(
+            Config.INGEST_INDEX_PATH,
+            json.dumps([Config.EMBEDDING_MODEL, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP])
+        )
+        
         print(f"Initialized ingestor with collection: {Config.CHROMA_COLLECTION_NAME}")
         print(f"Current document count: {self.collection.count()}")
     
@@ -72,80 +367,189 @@ class LegalDocumentIngestor:
             source_type: Type of document ("judgment", "act", etc.)
         
         Returns:
-            Number of chunks ingested
+            Number of chunks ingested (or previously ingested, if unchanged);
+            0 if the upsert failed
         """
-        print(f"\nProcessing: {pdf_path.name}")
+        file_hash = _file_sha1(pdf_path)
+        chunks = self._file_index.chunk_count(file_hash, pdf_path)
+        if chunks is not None:
+            print(f"Skipping unchanged {pdf_path.name}")
+            return chunks
         
-        # Extract text
-        full_text, page_metadata = extract_text_from_pdf(pdf_path)
+        documents, metadatas, ids = _extract_and_chunk(pdf_path, source_type)
+        upserted_before = len(self._upserted_files)
+        self._embed_and_upsert(pdf_path, documents, metadatas, ids, file_hash)
+        self._flush()
+        self._upsert_queue.join()
+        return sum(
+            chunk_count for _, path, chunk_count, _ in self._upserted_files[upserted_before:]
+            if path == str(pdf_path)
+        )
+    
+    def _embed_and_upsert(
+        self,
+        pdf_path: Path,
+        documents: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        file_hash: Optional[str] = None
+    ) -> int:
+        """
+        Queue a PDF's chunks for embedding and upsert to ChromaDB.
+        
+        Chunks from several PDFs are embedded together once
+        Config.EMBED_BATCH_SIZE of them (or Config.EMBED_BATCH_MAX_CHARS
+        characters) are waiting, and handed to the upsert thread once
+        Config.UPSERT_BATCH_SIZE are embedded; call _flush() to embed and
+        hand over the remainder. The PDF counts as ingested, and is added to
+        _upserted_files, only once the upsert thread has stored its chunks.
+        A PDF without chunks (no usable text) is recorded as processed with
+        0 chunks right away, so later runs skip it until its bytes change.
         
-        if not full_text.strip():
-            print(f"  WARNING: No text extracted from {pdf_path.name}")
+        Args:
+            pdf_path: Path of the source PDF (for progress messages)
+            documents: Chunk texts
+            metadatas: Chunk metadata
+            ids: Chunk IDs
+            file_hash: SHA1 of the PDF, recorded as processed once upserted
+        
+        Returns:
+            Number of chunks queued
+        """
+        if not documents:
+            if file_hash is not None:
+                self._file_index.mark_processed([(file_hash, str(pdf_path), 0, pdf_path.stat().st_mtime)])
             return 0
         
-        # Parse metadata
-        filename_meta = parse_filename_metadata(pdf_path.name)
-        content_meta = parse_case_metadata_from_text(full_text)
+        self._unembedded["documents"].extend(documents)
+        self._unembedded["metadatas"].extend(metadatas)
+        self._unembedded["ids"].extend(ids)
+        self._unembedded_chars += sum(map(len, documents))
+        if file_hash is not None:
+            self._unembedded_files.append((file_hash, str(pdf_path), len(documents), pdf_path.stat().st_mtime))
         
-        # Clean text
-        cleaned_text = clean_text(full_text)
+        if (len(self._unembedded["ids"]) >= Config.EMBED_BATCH_SIZE
+                or self._unembedded_chars >= Config.EMBED_BATCH_MAX_CHARS):
+            self._embed_pending()
+            if len(self._pending["ids"]) >= Config.UPSERT_BATCH_SIZE:
+                self._flush()
         
-        # Chunk text
-        chunks = chunk_text_with_metadata(
-            cleaned_text,
-            Config.CHUNK_SIZE,
-            Config.CHUNK_OVERLAP,
-            page_metadata
-        )
+        return len(documents)
+    
+    def _embed_pending(self) -> None:
+        """Embed all chunks waiting for embedding and add them to the upsert batch."""
+        batch, files = self._unembedded, self._unembedded_files
+        if not batch["ids"]:
+            return
         
-        print(f"  Extracted {len(page_metadata)} pages, created {len(chunks)} chunks")
+        # Reset first so a failed batch is dropped rather than retried with
+        # every later PDF; its files are not marked processed either way
+        self._unembedded = {"documents": [], "metadatas": [], "ids": []}
+        self._unembedded_files = []
+        self._unembedded_chars = 0
         
-        # Prepare data for ChromaDB
-        documents = []
-        metadatas = []
-        ids = []
+        # Generate embeddings, only for chunk texts not embedded before
+        documents = batch["documents"]
+        keys = [ChunkEmbeddingCache.key(text) for text in documents]
+        embeddings_by_key = self._embedding_cache.get_many(keys)
+        misses = {key: text for key, text in zip(keys, documents) if key not in embeddings_by_key}
+        if misses:
+            print(f"  Generating embeddings for {len(misses)} of {len(documents)} chunks...")
+            new_embeddings = dict(zip(misses, self._embed_texts(list(misses.values()))))
+            self._embedding_cache.put_many(new_embeddings)
+            embeddings_by_key.update(new_embeddings)
+        embeddings = np.stack([embeddings_by_key[key] for key in keys])
         
-        for chunk in chunks:
-            # Create unique ID
-            chunk_id = f"{pdf_path.stem}_{chunk['chunk_index']}"
-            
-            # Combine metadata
-            metadata = {
-                "source_file": pdf_path.name,
-                "source_type": source_type,
-                "page_number": chunk["page_number"],
-                "chunk_index": chunk["chunk_index"],
-                "case_name": content_meta.get("case_name"),
-                "court": filename_meta.get("court") or content_meta.get("bench"),
-                "judgment_date": content_meta.get("judgment_date"),
-                "citation": content_meta.get("citation"),
-                "year": filename_meta.get("year"),
-                "act_name": filename_meta.get("act_name"),
-                "url": None  # Can be populated from manifest
-            }
-            
-            # Remove None values
-            metadata = {k: v for k, v in metadata.items() if v is not None}
-            
-            documents.append(chunk["text"])
-            metadatas.append(metadata)
-            ids.append(chunk_id)
-        
-        # Generate embeddings
-        print(f"  Generating embeddings...")
-        embeddings = self.embedding_model.embed_texts(documents, batch_size=32)
-        
-        # Upsert to ChromaDB
-        print(f"  Upserting to ChromaDB...")
-        self.collection.upsert(
-            documents=documents,
-            metadatas=metadatas,
-            embeddings=embeddings,
-            ids=ids
-        )
+        self._pending["documents"].extend(documents)
+        self._pending["metadatas"].extend(batch["metadatas"])
+        self._pending["embeddings"].extend(embeddings.tolist())
+        self._pending["ids"].extend(batch["ids"])
+        self._pending_files.extend(files)
+    
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, halving the encoder batch size while the GPU runs out of memory.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Embeddings array
+        """
+        batch_size = Config.EMBED_BATCH_SIZE
+        while True:
+            try:
+                return self.embedding_model.embed_texts(texts, batch_size=batch_size)
+            except RuntimeError as e:
+                # torch.cuda.OutOfMemoryError is a RuntimeError subclass
+                if "out of memory" not in str(e).lower() or batch_size <= 1:
+                    raise
+                batch_size //= 2
+                print(f"  WARNING: GPU out of memory, retrying with batch size {batch_size}")
+    
+    def _flush(self) -> None:
+        """Embed all waiting chunks and queue everything pending for upsert in one batch."""
+        self._embed_pending()
+        if not self._pending["ids"]:
+            return
         
-        print(f"  ✓ Ingested {len(chunks)} chunks from {pdf_path.name}")
-        return len(chunks)
+        if self._upserter is None:
+            self._upserter = threading.Thread(target=self._upsert_worker, name="chroma-upsert", daemon=True)
+            self._upserter.start()
+        
+        # Blocks while the queue is full
+        self._upsert_queue.put((self._pending, self._pending_files))
+        self._pending = {"documents": [], "metadatas": [], "embeddings": [], "ids": []}
+        self._pending_files = []
+    
+    def _upsert_worker(self) -> None:
+        """Upsert queued batches and record their PDFs until a None batch arrives."""
+        while True:
+            item = self._upsert_queue.get()
+            try:
+                if item is None:
+                    return
+                
+                batch, files = item
+                print(f"  Upserting {len(batch['ids'])} chunks to ChromaDB...")
+                self.collection.upsert(**batch)
+                bump_index_version()
+                
+                # Only mark PDFs processed once their chunks are actually stored
+                self._file_index.mark_processed(files)
+                self._upserted_files.extend(files)
+                for _, path, chunk_count, _ in files:
+                    print(f"  ✓ Ingested {chunk_count} chunks from {Path(path).name}")
+            except Exception as e:
+                print(f"  ERROR upserting {len(item[0]['ids'])} chunks from {len(item[1])} PDFs: {e}")
+            finally:
+                self._upsert_queue.task_done()
+    
+    def _stop_upserter(self) -> None:
+        """Wait for all queued batches to be upserted and stop the upsert thread."""
+        if self._upserter is None:
+            return
+        self._upsert_queue.put(None)
+        self._upserter.join()
+        self._upserter = None
+    
+    def _consume_extractions(self, done, futures: Dict[Future, Tuple[Path, str]], progress: tqdm) -> None:
+        """
+        Queue the chunks of finished extractions for embedding and upsert.
+        
+        Args:
+            done: Finished futures
+            futures: In-flight futures and their (pdf_path, file_hash); the
+                consumed ones are removed
+            progress: Progress bar, advanced once per PDF
+        """
+        for future in done:
+            pdf_path, file_hash = futures.pop(future)
+            try:
+                self._embed_and_upsert(pdf_path, *future.result(), file_hash=file_hash)
+            except Exception as e:
+                print(f"  ERROR processing {pdf_path.name}: {e}")
+            progress.update()
     
     def ingest_directory(self, directory: Path, source_type: str = "judgment") -> Dict[str, int]:
         """
@@ -158,29 +562,79 @@ class LegalDocumentIngestor:
         Returns:
             Dict with statistics
         """
-        pdf_files = list_pdf_files(directory, recursive=True)
+        total_chunks = 0
+        successful_files = 0
+        total_files = 0
+        unchanged_files = 0
         
-        if not pdf_files:
+        # Extraction runs in worker processes; embedding and upserts stay in
+        # this process so the model and collection are loaded only once.
+        # PDFs are submitted as the directory walk finds them, so workers
+        # start parsing before the walk has finished, and results are
+        # consumed during the walk, so only a few PDFs' chunks are held in
+        # memory at once. Upserts run on their own thread, so the three
+        # stages overlap.
+        #
+        # The upsert thread (left running by ingest_pdf(), say) is stopped
+        # before forking. A fork-based pool starts all of its workers on the
+        # first submit, before this directory's first batch restarts it.
+        pdf_files = list_pdf_files(directory, recursive=True)
+        first_pdf = next(pdf_files, None)
+        if first_pdf is None:
             print(f"No PDF files found in {directory}")
             return {"files": 0, "chunks": 0}
         
-        print(f"\nFound {len(pdf_files)} PDF files in {directory}")
+        self._stop_upserter()
+        upserted_before = len(self._upserted_files)
+        with ProcessPoolExecutor(
+            max_workers=Config.INGEST_WORKERS,
+            mp_context=_worker_context(),
+            initializer=_init_worker
+        ) as pool, tqdm(desc=f"Ingesting {source_type}s", unit="file") as progress:
+            futures: Dict[Future, Tuple[Path, str]] = {}
+            max_in_flight = _EXTRACTIONS_PER_WORKER * Config.INGEST_WORKERS
+            for pdf_path in itertools.chain([first_pdf], pdf_files):
+                total_files += 1
+                try:
+                    file_hash = _file_sha1(pdf_path)
+                except OSError as e:
+                    print(f"  ERROR reading {pdf_path.name}: {e}")
+                    continue
+                
+                # Unchanged PDFs from earlier runs are counted, not re-ingested
+                chunks = self._file_index.chunk_count(file_hash, pdf_path)
+                if chunks is not None:
+                    total_chunks += chunks
+                    # PDFs without usable text are skipped but not counted as ingested
+                    if chunks:
+                        successful_files += 1
+                    unchanged_files += 1
+                    continue
+                
+                if len(futures) >= max_in_flight:
+                    self._consume_extractions(wait(futures, return_when=FIRST_COMPLETED).done, futures, progress)
+                
+                # Same-stem PDFs in different subdirectories get distinct chunk
+                # IDs; top-level PDFs keep their stem as the key
+                doc_key = pdf_path.relative_to(directory).with_suffix("").as_posix()
+                future = pool.submit(_extract_and_chunk, pdf_path, source_type, doc_key)
+                futures[future] = (pdf_path, file_hash)
+            
+            self._consume_extractions(as_completed(futures), futures, progress)
         
-        total_chunks = 0
-        successful_files = 0
+        print(f"\nFound {total_files} PDF files in {directory}, {unchanged_files} unchanged since the last run")
         
-        for pdf_path in tqdm(pdf_files, desc=f"Ingesting {source_type}s"):
-            try:
-                chunks = self.ingest_pdf(pdf_path, source_type)
-                total_chunks += chunks
-                if chunks > 0:
-                    successful_files += 1
-            except Exception as e:
-                print(f"  ERROR processing {pdf_path.name}: {e}")
+        # Upsert this directory's remaining chunks, then count the PDFs whose
+        # chunks were actually stored
+        self._flush()
+        self._stop_upserter()
+        for _, _, chunk_count, _ in self._upserted_files[upserted_before:]:
+            total_chunks += chunk_count
+            successful_files += 1
         
         return {
             "files": successful_files,
-            "total_files": len(pdf_files),
+            "total_files": total_files,
             "chunks": total_chunks
         }
     
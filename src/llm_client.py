@@ -7,9 +7,13 @@ error handling with retries.
 """
 
 import json
-import time
+import hashlib
+import threading
 from typing import Dict, Optional, Any
+import diskcache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from src.config import Config
 
@@ -24,22 +28,41 @@ class GoogleAIClient:
         
         if not self.api_key or not self.endpoint:
             raise ValueError("GOOGLE_API_KEY and GOOGLE_AI_ENDPOINT must be set in .env")
+        
+        # Pooled keep-alive connections; urllib3 retries transient failures
+        # (connection errors, 429 and 5xx) with exponential backoff
+        retry = Retry(
+            total=Config.MAX_RETRIES,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["POST"],
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Responses to identical deterministic requests, persisted across runs
+        self._cache = diskcache.Cache(Config.LLM_CACHE_DIR) if Config.LLM_CACHE_DIR else None
     
     def generate(
         self,
         prompt: str,
         temperature: float = 0.0,
-        max_output_tokens: int = None,
-        retry_count: int = 3
+        max_output_tokens: int = None
     ) -> Dict[str, Any]:
         """
         Generate text using Google AI Studio API.
         
+        Transient failures are retried up to Config.MAX_RETRIES times by
+        the session's retry policy. Successful temperature 0 responses are
+        cached on disk and returned for identical later requests.
+        
         Args:
             prompt: The prompt text
             temperature: Generation temperature (0.0-1.0)
             max_output_tokens: Maximum tokens to generate
-            retry_count: Number of retries on failure
         
         Returns:
             Dict with 'text' and 'raw_response' keys
@@ -47,6 +70,16 @@ class GoogleAIClient:
         if max_output_tokens is None:
             max_output_tokens = Config.MAX_OUTPUT_TOKENS
         
+        # Sampled (temperature > 0) responses are not reproducible, so not cached
+        cache_key = None
+        if self._cache is not None and temperature <= 0.0:
+            cache_key = hashlib.sha256(
+                f"{self.endpoint}:{temperature}:{max_output_tokens}:{prompt}".encode("utf-8")
+            ).hexdigest()
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         # Prepare request payload
         payload = {
             "contents": [{
@@ -65,53 +98,47 @@ class GoogleAIClient:
         # Add API key to URL
         url = f"{self.endpoint}?key={self.api_key}"
         
-        # Retry logic
-        for attempt in range(retry_count):
-            try:
-                response = requests.post(
-                    url,
-                    headers=headers,
-                    json=payload,
-                    timeout=60
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    
-                    # Extract text from response
-                    text = self._extract_text(result)
-                    
-                    return {
-                        "text": text,
-                        "raw_response": result
-                    }
-                else:
-                    error_msg = f"API error {response.status_code}: {response.text}"
-                    print(f"Attempt {attempt + 1}/{retry_count} failed: {error_msg}")
-                    
-                    if attempt < retry_count - 1:
-                        time.sleep(2 ** attempt)  # Exponential backoff
-                    else:
-                        return {
-                            "text": f"[ERROR: {error_msg}]",
-                            "raw_response": {"error": error_msg}
-                        }
-            
-            except Exception as e:
-                print(f"Attempt {attempt + 1}/{retry_count} failed: {e}")
-                
-                if attempt < retry_count - 1:
-                    time.sleep(2 ** attempt)
-                else:
-                    return {
-                        "text": f"[ERROR: {str(e)}]",
-                        "raw_response": {"error": str(e)}
-                    }
-        
-        return {
-            "text": "[ERROR: All retry attempts failed]",
-            "raw_response": {"error": "All retry attempts failed"}
+        try:
+            response = self.session.post(
+                url,
+                headers=headers,
+                json=payload,
+                timeout=60
+            )
+        except Exception as e:
+            print(f"Request failed: {e}")
+            return {
+                "text": f"[ERROR: {str(e)}]",
+                "raw_response": {"error": str(e)}
+            }
+        
+        if response.status_code != 200:
+            error_msg = f"API error {response.status_code}: {response.text}"
+            print(f"Request failed: {error_msg}")
+            return {
+                "text": f"[ERROR: {error_msg}]",
+                "raw_response": {"error": error_msg}
+            }
+        
+        try:
+            result = response.json()
+        except ValueError as e:
+            print(f"Invalid JSON response: {e}")
+            return {
+                "text": f"[ERROR: {str(e)}]",
+                "raw_response": {"error": str(e)}
+            }
+        
+        # Extract text from response
+        text = self._extract_text(result)
+        
+        generated = {
+            "text": text,
+            "raw_response": result
         }
+        if cache_key is not None:
+            self._cache.set(cache_key, generated)
+        return generated
     
     def _extract_text(self, response: Dict) -> str:
         """
@@ -142,11 +169,14 @@ class GoogleAIClient:
 
 # Global instance
 _llm_client_instance = None
+_llm_client_lock = threading.Lock()
 
 
 def get_llm_client() -> GoogleAIClient:
-    """Get or create the global LLM client instance."""
+    """Get or create the global LLM client instance (created at most once, even across threads)."""
     global _llm_client_instance
     if _llm_client_instance is None:
-        _llm_client_instance = GoogleAIClient()
+        with _llm_client_lock:
+            if _llm_client_instance is None:
+                _llm_client_instance = GoogleAIClient()
     return _llm_client_instance
@@ -0,0 +1,174 @@
+"""
+Batched audit log writer for Legal Assistant RAG Chatbot.
+
+Collects request log entries on an asyncio queue and appends them as
+newline-delimited JSON to one file per mode per day. Entries are flushed
+every Config.LOG_FLUSH_MS or Config.LOG_BATCH_MAX entries, with a single
+fdatasync per file per batch, so request handlers never wait on disk.
+With Config.LOG_WAL, entries go to the binary write-ahead log in
+src/wal_logger.py instead.
+"""
+
+import os
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+import orjson
+
+from src.config import Config
+from src.verify_and_log import _ensure_log_dirs
+
+# fdatasync is not available on macOS/Windows
+_sync_file = getattr(os, "fdatasync", os.fsync)
+
+
+class LogWriter:
+    """Asynchronous, batched NDJSON log writer."""
+
+    def __init__(self, flush_ms: float = None, batch_max: int = None):
+        """
+        Initialize the log writer.
+
+        Args:
+            flush_ms: Time to collect entries after the first arrives.
+                      Defaults to Config.LOG_FLUSH_MS.
+            batch_max: Maximum entries per batch. Defaults to Config.LOG_BATCH_MAX.
+        """
+        self.flush_ms = Config.LOG_FLUSH_MS if flush_ms is None else flush_ms
+        self.batch_max = Config.LOG_BATCH_MAX if batch_max is None else batch_max
+
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        # Entries a cancelled writer task had collected but not yet written
+        self._unwritten: List[Tuple[Path, Dict]] = []
+
+    @staticmethod
+    def path_for(mode: str, now: Optional[datetime] = None) -> Path:
+        """
+        Get the day's log file for a mode.
+
+        Args:
+            mode: Request mode (research/judgment/summarize)
+            now: Request time; defaults to now
+
+        Returns:
+            Path of the NDJSON file entries for this mode are appended to
+        """
+        return Config.LOGS_DIR / f"{mode}_{(now or datetime.now()).strftime('%Y%m%d')}.jsonl"
+
+    def _ensure_worker(self) -> None:
+        """Start the writer task on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and not self._worker.done():
+            return
+
+        # Entries still queued for a writer task that can no longer run (its
+        # event loop ended) are moved to the new queue, not dropped
+        pending, self._unwritten = self._unwritten, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=max(Config.LOG_QUEUE_SIZE, len(pending)))
+        for item in pending:
+            self._queue.put_nowait(item)
+        self._worker = loop.create_task(self._run())
+
+    async def enqueue(self, log_entry: Dict, mode: str, now: Optional[datetime] = None) -> Path:
+        """
+        Queue a log entry for writing.
+
+        Durability is eventual: the entry is on disk after the next batch
+        flush, not when this returns. Waits while Config.LOG_QUEUE_SIZE
+        entries are already queued.
+
+        Args:
+            log_entry: Log entry dict
+            mode: Request mode (for filename)
+            now: Request time, as passed to create_log_entry; defaults to now
+
+        Returns:
+            Path of the file the entry will be appended to
+        """
+        if Config.LOG_WAL:
+            # Imported lazily: msgpack is only required for the WAL
+            from src.wal_logger import get_wal_logger
+            return get_wal_logger().append(log_entry)
+
+        self._ensure_worker()
+        filepath = self.path_for(mode, now)
+        await self._queue.put((filepath, log_entry))
+        return filepath
+
+    async def flush(self) -> None:
+        """Wait until every queued entry has been written."""
+        if Config.LOG_WAL:
+            from src.wal_logger import get_wal_logger
+            await asyncio.to_thread(get_wal_logger().commit)
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def _run(self) -> None:
+        """Collect queued entries into batches and write them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_ms / 1000
+
+            try:
+                while len(batch) < self.batch_max:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # The event loop is shutting down; the next loop's writer
+                # task writes these first
+                self._unwritten = batch
+                raise
+
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                print(f"ERROR: Could not write {len(batch)} log entries: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_batch(self, batch: List[Tuple[Path, Dict]]) -> None:
+        """Append a batch of entries, one write and one sync per file."""
+        lines: Dict[Path, List[bytes]] = {}
+        for filepath, log_entry in batch:
+            # Same encoding as per-request log files: UTF-8, non-JSON values as str
+            lines.setdefault(filepath, []).append(orjson.dumps(log_entry, default=str) + b"\n")
+
+        _ensure_log_dirs()
+        for filepath, file_lines in lines.items():
+            async with aiofiles.open(filepath, "ab") as f:
+                await f.write(b"".join(file_lines))
+                await f.flush()
+                await asyncio.to_thread(_sync_file, f.fileno())
+
+
+# Global instance for reuse
+_log_writer_instance = None
+
+
+def get_log_writer() -> LogWriter:
+    """
+    Get or create the global log writer instance.
+
+    Returns:
+        LogWriter instance
+    """
+    global _log_writer_instance
+    if _log_writer_instance is None:
+        _log_writer_instance = LogWriter()
+    return _log_writer_instance
@@ -6,37 +6,89 @@ and summarization modes. Templates include system instructions,
 retrieved passage formatting, and output format specifications.
 """
 
-from typing import List, Dict
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
 
+from src.types_ import RetrievedBatch, index_version
 
-def format_retrieved_passages(retrieved: List[Dict]) -> str:
+
+# Assembled prompts keyed by template, input hash, and retrieved doc IDs
+_PROMPT_CACHE_SIZE = 1024
+_prompt_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+_prompt_cache_lock = threading.Lock()
+
+
+def _prompt_cache_key(template: str, text: str, retrieved: RetrievedBatch, *extra) -> Optional[Tuple]:
+    """
+    Build the prompt cache key, or None if the retrieved docs lack IDs.
+    
+    Args:
+        template: Template name
+        text: User-supplied text that goes into the prompt
+        retrieved: Retrieved documents
+        extra: Any other template parameters
+    
+    Returns:
+        Hashable cache key
+    """
+    doc_ids = tuple(retrieved.ids)
+    if None in doc_ids:
+        return None
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    return (template, digest, doc_ids, extra, index_version())
+
+
+def _cached_prompt(key: Optional[Tuple], build: Callable[[], str]) -> str:
+    """Return the cached prompt for key, building and caching it on a miss."""
+    if key is None:
+        return build()
+    
+    with _prompt_cache_lock:
+        prompt = _prompt_cache.get(key)
+        if prompt is not None:
+            _prompt_cache.move_to_end(key)
+            return prompt
+    
+    prompt = build()
+    with _prompt_cache_lock:
+        _prompt_cache[key] = prompt
+        while len(_prompt_cache) > _PROMPT_CACHE_SIZE:
+            _prompt_cache.popitem(last=False)
+    return prompt
+
+
+def format_retrieved_passages(retrieved: RetrievedBatch) -> str:
     """
     Format retrieved passages with bracket numbers and metadata.
     
+    Fragments are collected in one list and joined once, so no per-passage
+    strings are built and copied again.
+    
     Args:
-        retrieved: List of retrieved document dicts
+        retrieved: Retrieved documents
     
     Returns:
         Formatted string with numbered passages
     """
-    passages = []
-    for i, doc in enumerate(retrieved, start=1):
-        metadata = doc.get("metadata", {})
-        source = metadata.get("source_file", "Unknown")
-        page = metadata.get("page_number", "?")
+    parts = []
+    append = parts.append
+    for i, (document, metadata) in enumerate(zip(retrieved.documents, retrieved.metadatas), start=1):
+        if i > 1:
+            append("\n")
+        append(f"[{i}] Source: {metadata.get('source_file', 'Unknown')}, Page: {metadata.get('page_number', '?')}")
         case_name = metadata.get("case_name", "")
-        
-        header = f"[{i}] Source: {source}, Page: {page}"
         if case_name:
-            header += f", Case: {case_name}"
-        
-        passage = f"{header}\n{doc['document']}\n"
-        passages.append(passage)
+            append(f", Case: {case_name}")
+        append("\n")
+        append(document)
+        append("\n")
     
-    return "\n".join(passages)
+    return "".join(parts)
 
 
-def build_research_prompt(query: str, retrieved: List[Dict]) -> str:
+def build_research_prompt(query: str, retrieved: RetrievedBatch) -> str:
     """
     Build prompt for legal research mode.
     
@@ -47,6 +99,12 @@ def build_research_prompt(query: str, retrieved: List[Dict]) -> str:
     Returns:
         Complete prompt string
     """
+    key = _prompt_cache_key("research", query, retrieved)
+    return _cached_prompt(key, lambda: _build_research_prompt(query, retrieved))
+
+
+def _build_research_prompt(query: str, retrieved: RetrievedBatch) -> str:
+    """Assemble the research prompt (uncached)."""
     passages = format_retrieved_passages(retrieved)
     
     prompt = f"""You are a legal research assistant for Indian law. Your task is to provide accurate, well-researched answers based ONLY on the provided legal documents.
@@ -83,7 +141,7 @@ CRITICAL: Use ONLY the bracket numbers [1] through [{len(retrieved)}] that corre
     return prompt
 
 
-def build_judgment_prompt(facts: str, mode: str, retrieved: List[Dict]) -> str:
+def build_judgment_prompt(facts: str, mode: str, retrieved: RetrievedBatch) -> str:
     """
     Build prompt for judgment simulation mode.
     
@@ -95,6 +153,12 @@ def build_judgment_prompt(facts: str, mode: str, retrieved: List[Dict]) -> str:
     Returns:
         Complete prompt string with appropriate header
     """
+    key = _prompt_cache_key("judgment", facts, retrieved, mode)
+    return _cached_prompt(key, lambda: _build_judgment_prompt(facts, mode, retrieved))
+
+
+def _build_judgment_prompt(facts: str, mode: str, retrieved: RetrievedBatch) -> str:
+    """Assemble the judgment prompt (uncached)."""
     passages = format_retrieved_passages(retrieved)
     
     header_text = "HYPOTHETICAL ANALYSIS — NOT LEGAL ADVICE" if mode == "hypothetical" else "REFERENCE ANALYSIS — NOT LEGAL ADVICE"
@@ -148,7 +212,7 @@ CRITICAL: Cite ONLY using bracket numbers [1] through [{len(retrieved)}]. Do not
     return prompt
 
 
-def build_summarize_prompt(query: str, retrieved: List[Dict], case_text: str = None) -> str:
+def build_summarize_prompt(query: str, retrieved: RetrievedBatch, case_text: str = None) -> str:
     """
     Build prompt for summarization/headnote generation mode.
     
@@ -160,6 +224,15 @@ def build_summarize_prompt(query: str, retrieved: List[Dict], case_text: str = N
     Returns:
         Complete prompt string
     """
+    if case_text:
+        # Pasted case text is one-off input; hashing it would cost as much as building
+        return _build_summarize_prompt(query, retrieved, case_text)
+    key = _prompt_cache_key("summarize", query, retrieved)
+    return _cached_prompt(key, lambda: _build_summarize_prompt(query, retrieved))
+
+
+def _build_summarize_prompt(query: str, retrieved: RetrievedBatch, case_text: str = None) -> str:
+    """Assemble the summarize prompt (uncached)."""
     if case_text:
         content = f"CASE TEXT TO SUMMARIZE:\n{case_text}"
     else:
@@ -6,12 +6,16 @@ and reranking capabilities. Returns documents with metadata and distances
 for provenance tracking.
 """
 
-from typing import List, Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 
 from src.config import Config
-from src.embeddings_ import embed_query
+from src.embeddings_ import embed_query, get_embedding_model
+from src.types_ import RetrievedBatch, LSHIndex, index_version
 
 
 class LegalRetriever:
@@ -32,49 +36,119 @@ class LegalRetriever:
         except Exception as e:
             print(f"ERROR: Could not load collection: {e}")
             raise
+        
+        # Retrieval results keyed by (LSH signature, top_k, index_version())
+        self._signer: Optional[LSHIndex] = None
+        self._cache: "OrderedDict[Tuple, RetrievedBatch]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def retrieve(
         self,
         query: str,
         top_k: int = None,
-        filters: Optional[Dict] = None
-    ) -> List[Dict]:
-        """Retrieve relevant documents for a query."""
+        filters: Optional[Dict] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> RetrievedBatch:
+        """Retrieve relevant documents for a query.
+
+        A precomputed ``query_embedding`` may be passed to skip re-embedding
+        the query (e.g. when the caller already embedded it for the cache).
+        """
         if top_k is None:
             top_k = Config.DEFAULT_TOP_K
         
-        query_embedding = embed_query(query)
+        if query_embedding is None:
+            query_embedding = embed_query(query)
         
         where = None
         if filters:
             where = {k: v for k, v in filters.items() if v is not None}
         
+        # Documents are fetched in the same call: every result goes into the
+        # prompt, so a metadata-only query plus collection.get(ids=...) would
+        # only add a round trip. Split the call if results are ever filtered
+        # or reranked down before prompting.
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=[query_embedding.tolist()],
             n_results=top_k,
             where=where,
             include=["documents", "metadatas", "distances"]
         )
         
-        formatted_results = []
-        if results and results["ids"]:
-            for i in range(len(results["ids"][0])):
-                formatted_results.append({
-                    "id": results["ids"][0][i],
-                    "document": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "distance": results["distances"][0][i]
-                })
+        if not results or not results["ids"]:
+            return RetrievedBatch.empty()
         
-        return formatted_results
+        return RetrievedBatch(
+            ids=results["ids"][0],
+            documents=results["documents"][0],
+            metadatas=results["metadatas"][0],
+            distances=np.asarray(results["distances"][0], dtype=np.float32)
+        )
+
+
+    def retrieve_cached(
+        self,
+        query: str,
+        top_k: int = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> RetrievedBatch:
+        """
+        Retrieve documents, reusing results for queries with the same LSH signature.
+        
+        Paraphrases whose embeddings fall on the same side of every signature
+        hyperplane share one ChromaDB query. Entries are keyed by
+        index_version(), so re-ingesting (in any process) invalidates them.
+        
+        Args:
+            query: Query text
+            top_k: Number of results. Defaults to Config.DEFAULT_TOP_K.
+            query_embedding: Precomputed query embedding
+        
+        Returns:
+            RetrievedBatch, as returned by retrieve()
+        """
+        if top_k is None:
+            top_k = Config.DEFAULT_TOP_K
+        
+        if query_embedding is None:
+            query_embedding = embed_query(query)
+        
+        if Config.RETRIEVAL_CACHE_SIZE <= 0:
+            return self.retrieve(query, top_k=top_k, query_embedding=query_embedding)
+        
+        if self._signer is None:
+            self._signer = LSHIndex(
+                get_embedding_model().get_dimension(),
+                num_tables=1,
+                bits=Config.RETRIEVAL_SIGNATURE_BITS
+            )
+        key = (self._signer.signature(query_embedding), top_k, index_version())
+        
+        with self._cache_lock:
+            retrieved = self._cache.get(key)
+            if retrieved is not None:
+                self._cache.move_to_end(key)
+                return retrieved
+        
+        retrieved = self.retrieve(query, top_k=top_k, query_embedding=query_embedding)
+        if retrieved:
+            with self._cache_lock:
+                self._cache[key] = retrieved
+                while len(self._cache) > Config.RETRIEVAL_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return retrieved
+
+
+# Global instance
+_retriever_instance = None
+_retriever_lock = threading.Lock()
 
 
 def get_retriever() -> LegalRetriever:
-    """Get or create the global retriever instance."""
+    """Get or create the global retriever instance (created at most once, even across threads)."""
     global _retriever_instance
     if _retriever_instance is None:
-        _retriever_instance = LegalRetriever()
+        with _retriever_lock:
+            if _retriever_instance is None:
+                _retriever_instance = LegalRetriever()
     return _retriever_instance
-
-
-_retriever_instance = None
@@ -0,0 +1,168 @@
+"""
+Semantic query cache for Legal Assistant RAG Chatbot.
+
+Keeps previously generated responses keyed by their query embedding so that
+near-duplicate questions can be answered without repeating retrieval and
+generation. Lookups compare L2-normalized embeddings by cosine similarity,
+scanning a contiguous embedding matrix for small caches and switching to
+random-projection LSH buckets once the cache grows large. Entries expire after a TTL and are evicted
+least-recently-used first.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.config import Config
+from src.embeddings_ import get_embedding_model
+from src.types_ import LSHIndex
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """A cached response and the namespace and time it was stored under."""
+    __slots__ = ("namespace", "response", "timestamp")
+    namespace: Tuple
+    response: Dict
+    timestamp: float
+
+
+class SemanticCache:
+    """Embedding-keyed response cache with LRU eviction and TTL expiry."""
+
+    def __init__(
+        self,
+        dim: int,
+        tau: float = None,
+        max_size: int = None,
+        ttl: float = None
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            dim: Dimension of the query embeddings
+            tau: Minimum cosine similarity for a cache hit.
+                 Defaults to Config.SEMANTIC_CACHE_TAU.
+            max_size: Maximum number of cached entries.
+                      Defaults to Config.SEMANTIC_CACHE_SIZE.
+            ttl: Entry lifetime in seconds. Defaults to Config.SEMANTIC_CACHE_TTL.
+        """
+        self.dim = dim
+        self.tau = Config.SEMANTIC_CACHE_TAU if tau is None else tau
+        self.max_size = Config.SEMANTIC_CACHE_SIZE if max_size is None else max_size
+        self.ttl = Config.SEMANTIC_CACHE_TTL if ttl is None else ttl
+
+        # One index per namespace so that e.g. research and judgment
+        # responses for the same text never collide
+        self._indexes: Dict[Tuple, LSHIndex] = {}
+
+        # entry_id -> CacheEntry, oldest first
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _prepare(self, embedding: np.ndarray) -> np.ndarray:
+        """Convert an embedding to a normalized float32 vector."""
+        vec = np.asarray(embedding, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _remove(self, entry_id: int) -> None:
+        """Remove an entry and its vector from the cache."""
+        namespace = self._entries.pop(entry_id).namespace
+        index = self._indexes[namespace]
+        index.remove(entry_id)
+        if len(index) == 0:
+            del self._indexes[namespace]
+
+    def lookup(self, embedding: np.ndarray, namespace: Tuple = ()) -> Optional[Dict]:
+        """
+        Find a cached response for a query embedding.
+
+        Args:
+            embedding: Query embedding
+            namespace: Request parameters the cached response must share
+
+        Returns:
+            Cached response dict, or None on a miss
+        """
+        if self.max_size <= 0:
+            return None
+
+        vec = self._prepare(embedding)
+
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                return None
+
+            match = index.query(vec, self.tau)
+            if match is None:
+                return None
+            entry_id, _ = match
+
+            entry = self._entries[entry_id]
+            if time.time() - entry.timestamp > self.ttl:
+                self._remove(entry_id)
+                return None
+
+            self._entries.move_to_end(entry_id)
+            return entry.response
+
+    def add(self, embedding: np.ndarray, response: Dict, namespace: Tuple = ()) -> None:
+        """
+        Cache a response under its query embedding.
+
+        Args:
+            embedding: Query embedding
+            response: Response dict to return on future hits
+            namespace: Request parameters the response depends on
+        """
+        if self.max_size <= 0:
+            return
+
+        vec = self._prepare(embedding)
+
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = LSHIndex(self.dim)
+                self._indexes[namespace] = index
+
+            entry_id = self._next_id
+            self._next_id += 1
+            index.add(entry_id, vec)
+            self._entries[entry_id] = CacheEntry(namespace, response, time.time())
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global instance for reuse
+_semantic_cache_instance = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticCache:
+    """
+    Get or create the global semantic cache instance.
+
+    Safe to call from concurrent threads; the cache is created only once.
+
+    Returns:
+        SemanticCache instance sized for the embedding model
+    """
+    global _semantic_cache_instance
+    if _semantic_cache_instance is None:
+        with _semantic_cache_lock:
+            if _semantic_cache_instance is None:
+                _semantic_cache_instance = SemanticCache(get_embedding_model().get_dimension())
+    return _semantic_cache_instance
@@ -0,0 +1,250 @@
+"""
+Lightweight shared types for Legal Assistant RAG Chatbot.
+
+Retrieval results, the LSH index behind the semantic and retrieval caches,
+and the on-disk index version stamp. Depends only on numpy and the config,
+so prompt building and logging can use them without loading ChromaDB or the
+embedding model.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.config import Config
+
+
+@dataclass(frozen=True)
+class RetrievedBatch:
+    """
+    Top-k retrieval results as parallel per-passage arrays.
+    
+    Position i of every field describes the i-th ranked passage, cited in
+    prompts as [i + 1].
+    """
+    __slots__ = ("ids", "documents", "metadatas", "distances")
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict]
+    distances: np.ndarray
+    
+    @classmethod
+    def empty(cls) -> "RetrievedBatch":
+        """Create a batch with no passages."""
+        return cls([], [], [], np.empty(0, dtype=np.float32))
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def index_version() -> int:
+    """
+    Read the index version stamp that ingestion bumps after every upsert.
+    
+    The stamp lives on disk next to the collection, so an API server sees
+    re-ingestion done by a separate ingest process.
+    
+    Returns:
+        Current version, or 0 if nothing has been ingested since the stamp
+        was introduced
+    """
+    try:
+        with open(Config.INDEX_VERSION_PATH, "rb") as f:
+            return int(f.read() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_index_version() -> int:
+    """
+    Increment the index version stamp.
+    
+    The new value is written to a temporary file and renamed into place,
+    so readers never see a partial write. Meant for the single ingest
+    process; concurrent bumps could lose an increment.
+    
+    Returns:
+        New version
+    """
+    version = index_version() + 1
+    tmp_path = f"{Config.INDEX_VERSION_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_path, Config.INDEX_VERSION_PATH)
+    return version
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize embeddings to int8 with a symmetric per-vector scale.
+    
+    Args:
+        embeddings: Float array of shape (dimension,) or (n, dimension)
+    
+    Returns:
+        Tuple of (int8 codes, float32 scales) such that
+        embeddings ≈ codes * scales[..., None]
+    """
+    max_abs = np.abs(embeddings).max(axis=-1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    codes = np.rint(embeddings / scales[..., None]).astype(np.int8)
+    return codes, scales
+
+
+class LSHIndex:
+    """
+    Random-projection LSH index over normalized embeddings.
+
+    Vectors live in one contiguous matrix. While the index holds at most
+    min_entries vectors a query scores all of them with a single
+    matrix-vector product; beyond that only the query's LSH bucket mates
+    are scored.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        num_tables: int = None,
+        bits: int = None,
+        quantize: bool = None,
+        min_entries: int = None,
+        seed: int = 0
+    ):
+        """
+        Initialize the LSH index.
+
+        Args:
+            dim: Dimension of the embeddings
+            num_tables: Number of hash tables. Defaults to Config.LSH_NUM_TABLES.
+            bits: Hyperplanes (signature bits) per table. Defaults to Config.LSH_BITS.
+            quantize: Store vectors as int8 codes. Defaults to Config.EMBED_QUANTIZE.
+            min_entries: Size above which lookups use the LSH buckets instead
+                         of an exact scan. Defaults to Config.LSH_MIN_ENTRIES.
+            seed: Seed for the random projections
+        """
+        self.dim = dim
+        self.num_tables = Config.LSH_NUM_TABLES if num_tables is None else num_tables
+        self.bits = Config.LSH_BITS if bits is None else bits
+        self.quantize = Config.EMBED_QUANTIZE if quantize is None else quantize
+        self.min_entries = Config.LSH_MIN_ENTRIES if min_entries is None else min_entries
+
+        # All tables' hyperplanes in one (dim, num_tables * bits) matrix so
+        # hashing a vector is a single matrix-vector product
+        rng = np.random.default_rng(seed)
+        self._projections = rng.standard_normal((dim, self.num_tables * self.bits)).astype(np.float32)
+        self._powers = np.left_shift(np.uint64(1), np.arange(self.bits, dtype=np.uint64))
+
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(self.num_tables)]
+        self._keys: Dict[int, List[int]] = {}
+
+        # Rows [0, _size) of the matrix are live; capacity doubles as needed.
+        # Removal moves the last row into the freed slot to stay compact.
+        self._matrix = np.empty((0, dim), dtype=np.int8 if self.quantize else np.float32)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+
+    def _hash(self, vec: np.ndarray) -> List[int]:
+        """Compute one bucket key per table for a vector."""
+        signs = (vec @ self._projections).reshape(self.num_tables, self.bits) > 0
+        return [int(k) for k in signs.astype(np.uint64) @ self._powers]
+
+    def signature(self, vec: np.ndarray) -> int:
+        """
+        Compute the bucket key of a vector in the first hash table.
+
+        With a single table of up to 64 bits this serves as a compact
+        similarity-preserving fingerprint of the vector.
+
+        Args:
+            vec: Vector to hash (only its direction matters)
+
+        Returns:
+            Signature as an unsigned integer of self.bits bits
+        """
+        return self._hash(vec)[0]
+
+    def _grow(self) -> None:
+        """Double the storage capacity (starting at 16 rows)."""
+        capacity = max(16, 2 * len(self._matrix))
+        matrix = np.empty((capacity, self.dim), dtype=self._matrix.dtype)
+        scales = np.empty(capacity, dtype=np.float32)
+        row_ids = np.empty(capacity, dtype=np.int64)
+        matrix[:self._size] = self._matrix[:self._size]
+        scales[:self._size] = self._scales[:self._size]
+        row_ids[:self._size] = self._row_ids[:self._size]
+        self._matrix, self._scales, self._row_ids = matrix, scales, row_ids
+
+    def add(self, entry_id: int, vec: np.ndarray) -> None:
+        """Insert a normalized vector under an entry ID."""
+        keys = self._hash(vec)
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, set()).add(entry_id)
+        self._keys[entry_id] = keys
+
+        if self._size == len(self._matrix):
+            self._grow()
+        row = self._size
+        if self.quantize:
+            self._matrix[row], self._scales[row] = quantize_int8(vec)
+        else:
+            self._matrix[row], self._scales[row] = vec, 1.0
+        self._row_ids[row] = entry_id
+        self._rows[entry_id] = row
+        self._size += 1
+
+    def remove(self, entry_id: int) -> None:
+        """Remove an entry ID from the index."""
+        for table, key in zip(self._tables, self._keys.pop(entry_id)):
+            bucket = table[key]
+            bucket.discard(entry_id)
+            if not bucket:
+                del table[key]
+
+        row = self._rows.pop(entry_id)
+        last = self._size - 1
+        if row != last:
+            moved_id = int(self._row_ids[last])
+            self._matrix[row] = self._matrix[last]
+            self._scales[row] = self._scales[last]
+            self._row_ids[row] = moved_id
+            self._rows[moved_id] = row
+        self._size = last
+
+    def query(self, vec: np.ndarray, tau: float) -> Optional[Tuple[int, float]]:
+        """
+        Find the most similar indexed vector.
+
+        Args:
+            vec: Normalized query vector
+            tau: Minimum cosine similarity to accept
+
+        Returns:
+            (entry_id, score) of the best candidate, or None if none reaches tau
+        """
+        if self._size == 0:
+            return None
+
+        if self._size <= self.min_entries:
+            rows = slice(0, self._size)
+        else:
+            candidates: Set[int] = set()
+            for table, key in zip(self._tables, self._hash(vec)):
+                bucket = table.get(key)
+                if bucket:
+                    candidates |= bucket
+            if not candidates:
+                return None
+            rows = np.fromiter((self._rows[i] for i in candidates), dtype=np.int64, count=len(candidates))
+
+        scores = (self._matrix[rows] @ vec) * self._scales[rows]
+        best = int(scores.argmax())
+        if scores[best] < tau:
+            return None
+        return int(self._row_ids[rows][best]), float(scores[best])
+
+    def __len__(self) -> int:
+        return self._size
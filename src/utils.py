@@ -6,18 +6,98 @@ file listing utilities, and text cleaning/normalization functions.
 """
 
 import re
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-import pdfplumber
+from typing import Dict, Iterator, List, Optional, Tuple
+import pymupdf
 import pytesseract
 from PIL import Image
 import io
 
+from src.config import Config
+
+# Filename metadata patterns
+_COURT_RE = re.compile(r'\b(SC|HC|DC)\b', re.IGNORECASE)
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+_CASE_NUM_RE = re.compile(r'\d{4}_[A-Z]+_\d+')
+_ACT_PATTERNS = [
+    (act_name, re.compile(pattern, re.IGNORECASE))
+    for act_name, pattern in (
+        ("IPC", r'\bIPC\b'),
+        ("CrPC", r'\bCrPC\b'),
+        ("Evidence Act", r'\bEvidence\s*Act\b'),
+        ("Constitution", r'\bConstitution\b'),
+    )
+]
+
+# Judgment header patterns. These stay separate searches: each one can use
+# the regex engine's literal-prefix scan, which makes four searches of the
+# 2000-char header about 2-3x faster than one combined alternation.
+_CASE_NAME_RE = re.compile(
+    r'^([A-Z][A-Z\s&.,()]+)\s+(?:vs?\.?|versus)\s+([A-Z][A-Z\s&.,()]+)',
+    re.MULTILINE
+)
+_BENCH_RE = re.compile(r'BENCH:\s*(.+?)(?:\n|$)', re.IGNORECASE)
+_DATE_RE = re.compile(
+    r'(?:DATE|DECIDED ON|JUDGMENT DATE):\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    re.IGNORECASE
+)
+_CITATION_RE = re.compile(r'\((\d{4})\)\s+(\d+)\s+([A-Z]+)\s+(\d+)')
+
+# Text cleaning: whitespace runs (group 1) and dash/underscore separators
+_CLEAN_RE = re.compile(r'(\s+)|[-_]{5,}')
+
+# Pages checked for usable text before giving up on a PDF
+_EARLY_ABORT_PAGES = 3
+
+
+def _clean_sub(match: re.Match) -> str:
+    """Collapse whitespace to a single space and drop separators."""
+    return ' ' if match.group(1) else ''
+
+
+def _ocr_page(pdf_path: Path, page_num: int, dpi: int = None) -> str:
+    """
+    OCR a single PDF page.
+    
+    Reopens the PDF so it can run in a worker process.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: 1-based page number
+        dpi: Rendering resolution for OCR. Defaults to Config.OCR_DPI.
+    
+    Returns:
+        OCR text, or "" if OCR failed
+    """
+    if dpi is None:
+        dpi = Config.OCR_DPI
+    
+    try:
+        with pymupdf.open(pdf_path) as doc:
+            pix = doc[page_num - 1].get_pixmap(dpi=dpi, colorspace=pymupdf.csRGB, alpha=False)
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            return pytesseract.image_to_string(img)
+    except Exception as ocr_error:
+        print(f"OCR failed for page {page_num} of {pdf_path}: {ocr_error}")
+        return ""
+
 
 def extract_text_from_pdf(pdf_path: Path, use_ocr: bool = False) -> Tuple[str, List[Dict]]:
     """
     Extract text from a PDF file with optional OCR fallback.
     
+    Pages with fewer than Config.OCR_MIN_CHARS characters of native text
+    that contain images (i.e. look scanned) are OCRed, in parallel worker
+    processes (Config.OCR_WORKERS) when there are several.
+    
+    A PDF whose first few pages have less than Config.MIN_USEFUL_CHARS
+    characters of text and nothing to OCR is skipped without reading the
+    rest of its pages.
+    
     Args:
         pdf_path: Path to the PDF file
         use_ocr: If True, force OCR extraction
@@ -26,40 +106,52 @@ def extract_text_from_pdf(pdf_path: Path, use_ocr: bool = False) -> Tuple[str, L
         Tuple of (full_text, page_metadata_list)
         page_metadata_list contains dicts with page_number, text, char_count
     """
-    full_text = ""
-    page_metadata = []
-    
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                page_text = ""
-                
-                if not use_ocr:
-                    # Try standard text extraction first
-                    page_text = page.extract_text() or ""
+        # Try standard text extraction first
+        with pymupdf.open(pdf_path) as doc:
+            page_texts = []
+            ocr_pages = []
+            total_chars = 0
+            for page_num, page in enumerate(doc, start=1):
+                page_text = "" if use_ocr else page.get_text("text")
+                page_texts.append(page_text)
                 
-                # If no text extracted or OCR forced, use OCR
-                if not page_text.strip() or use_ocr:
-                    try:
-                        # Convert page to image and OCR
-                        img = page.to_image(resolution=300)
-                        pil_img = img.original
-                        page_text = pytesseract.image_to_string(pil_img)
-                    except Exception as ocr_error:
-                        print(f"OCR failed for page {page_num} of {pdf_path}: {ocr_error}")
-                        page_text = ""
+                # If (almost) no text on an image-bearing page or OCR forced, use OCR
+                chars = len(page_text.strip())
+                if use_ocr or (chars < Config.OCR_MIN_CHARS and page.get_images()):
+                    ocr_pages.append(page_num)
+                total_chars += chars
                 
-                full_text += page_text + "\n\n"
-                page_metadata.append({
-                    "page_number": page_num,
-                    "text": page_text,
-                    "char_count": len(page_text)
-                })
+                # Give up early on PDFs whose first pages have neither text nor scans to OCR
+                if (page_num == min(_EARLY_ABORT_PAGES, doc.page_count)
+                        and not ocr_pages and total_chars < Config.MIN_USEFUL_CHARS):
+                    print(f"WARNING: Skipping {pdf_path.name}: only {total_chars} characters "
+                          f"of text in the first {page_num} pages")
+                    return "", []
+        workers = min(Config.OCR_WORKERS, len(ocr_pages))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                ocr_texts = pool.map(_ocr_page, [pdf_path] * len(ocr_pages), ocr_pages)
+                for page_num, ocr_text in zip(ocr_pages, ocr_texts):
+                    page_texts[page_num - 1] = ocr_text
+        else:
+            for page_num in ocr_pages:
+                page_texts[page_num - 1] = _ocr_page(pdf_path, page_num)
     
     except Exception as e:
         print(f"Error extracting text from {pdf_path}: {e}")
         return "", []
     
+    full_text = "".join(page_text + "\n\n" for page_text in page_texts)
+    page_metadata = [
+        {
+            "page_number": page_num,
+            "text": page_text,
+            "char_count": len(page_text)
+        }
+        for page_num, page_text in enumerate(page_texts, start=1)
+    ]
+    
     return full_text, page_metadata
 
 
@@ -78,6 +170,13 @@ def parse_filename_metadata(filename: str) -> Dict[str, Optional[str]]:
     Returns:
         Dict with parsed metadata (court, year, case_number, etc.)
     """
+    # Remove extension
+    return dict(_parse_filename_stem(Path(filename).stem))
+
+
+@lru_cache(maxsize=4096)
+def _parse_filename_stem(name: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """Parse filename metadata as hashable (key, value) pairs for caching."""
     metadata = {
         "court": None,
         "year": None,
@@ -85,38 +184,28 @@ def parse_filename_metadata(filename: str) -> Dict[str, Optional[str]]:
         "act_name": None
     }
     
-    # Remove extension
-    name = Path(filename).stem
-    
     # Try to extract court
-    court_match = re.search(r'\b(SC|HC|DC)\b', name, re.IGNORECASE)
+    court_match = _COURT_RE.search(name)
     if court_match:
         metadata["court"] = court_match.group(1).upper()
     
     # Try to extract year
-    year_match = re.search(r'\b(19|20)\d{2}\b', name)
+    year_match = _YEAR_RE.search(name)
     if year_match:
         metadata["year"] = year_match.group(0)
     
     # Try to extract case number
-    case_match = re.search(r'\d{4}_[A-Z]+_\d+', name)
+    case_match = _CASE_NUM_RE.search(name)
     if case_match:
         metadata["case_number"] = case_match.group(0)
     
     # Check for common act names
-    act_patterns = {
-        "IPC": r'\bIPC\b',
-        "CrPC": r'\bCrPC\b',
-        "Evidence Act": r'\bEvidence\s*Act\b',
-        "Constitution": r'\bConstitution\b'
-    }
-    
-    for act_name, pattern in act_patterns.items():
-        if re.search(pattern, name, re.IGNORECASE):
+    for act_name, pattern in _ACT_PATTERNS:
+        if pattern.search(name):
             metadata["act_name"] = act_name
             break
     
-    return metadata
+    return tuple(metadata.items())
 
 
 def parse_case_metadata_from_text(text: str) -> Dict[str, Optional[str]]:
@@ -146,30 +235,22 @@ def parse_case_metadata_from_text(text: str) -> Dict[str, Optional[str]]:
     header_text = text[:2000]
     
     # Try to extract case name (usually in ALL CAPS at the beginning)
-    case_name_match = re.search(
-        r'^([A-Z][A-Z\s&.,()]+)\s+(?:vs?\.?|versus)\s+([A-Z][A-Z\s&.,()]+)',
-        header_text,
-        re.MULTILINE
-    )
+    case_name_match = _CASE_NAME_RE.search(header_text)
     if case_name_match:
         metadata["case_name"] = f"{case_name_match.group(1).strip()} v. {case_name_match.group(2).strip()}"
     
     # Try to extract bench
-    bench_match = re.search(r'BENCH:\s*(.+?)(?:\n|$)', header_text, re.IGNORECASE)
+    bench_match = _BENCH_RE.search(header_text)
     if bench_match:
         metadata["bench"] = bench_match.group(1).strip()
     
     # Try to extract date
-    date_match = re.search(
-        r'(?:DATE|DECIDED ON|JUDGMENT DATE):\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-        header_text,
-        re.IGNORECASE
-    )
+    date_match = _DATE_RE.search(header_text)
     if date_match:
         metadata["judgment_date"] = date_match.group(1)
     
     # Try to extract citation
-    citation_match = re.search(r'\((\d{4})\)\s+(\d+)\s+([A-Z]+)\s+(\d+)', header_text)
+    citation_match = _CITATION_RE.search(header_text)
     if citation_match:
         metadata["citation"] = f"({citation_match.group(1)}) {citation_match.group(2)} {citation_match.group(3)} {citation_match.group(4)}"
     
@@ -178,12 +259,10 @@ def parse_case_metadata_from_text(text: str) -> Dict[str, Optional[str]]:
 
 def clean_text(text: str) -> str:
     """
-    Clean and normalize extracted text.
+    Clean and normalize extracted text in a single regex pass.
     
-    - Remove excessive whitespace
-    - Normalize line breaks
-    - Preserve section markers
-    - Remove page numbers and headers/footers
+    - Collapse all whitespace, line breaks included, to single spaces
+    - Remove separator runs of five or more dashes or underscores
     
     Args:
         text: Raw extracted text
@@ -191,37 +270,27 @@ def clean_text(text: str) -> str:
     Returns:
         Cleaned text
     """
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Normalize line breaks
-    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
-    
-    # Remove common page number patterns
-    text = re.sub(r'\n\s*\d+\s*\n', '\n', text)
-    text = re.sub(r'\n\s*Page\s+\d+\s*\n', '\n', text, flags=re.IGNORECASE)
-    
-    # Remove excessive dashes or underscores (often used as separators)
-    text = re.sub(r'[-_]{5,}', '', text)
-    
-    return text.strip()
+    return _CLEAN_RE.sub(_clean_sub, text).strip()
 
 
-def list_pdf_files(directory: Path, recursive: bool = True) -> List[Path]:
+def list_pdf_files(directory: Path, recursive: bool = True) -> Iterator[Path]:
     """
     List all PDF files in a directory.
     
+    The directory is walked lazily, so callers can start on the first
+    files before the walk finishes.
+    
     Args:
         directory: Directory to search
         recursive: If True, search subdirectories
     
     Returns:
-        List of PDF file paths
+        Iterator over PDF file paths
     """
     if recursive:
-        return list(directory.rglob("*.pdf"))
+        return directory.rglob("*.pdf")
     else:
-        return list(directory.glob("*.pdf"))
+        return directory.glob("*.pdf")
 
 
 def chunk_text_with_metadata(
@@ -246,19 +315,20 @@ def chunk_text_with_metadata(
     start = 0
     chunk_index = 0
     
+    # Character offset at which each page ends
+    page_ends = list(accumulate(page["char_count"] for page in page_metadata))
+    
     while start < len(text):
         end = start + chunk_size
         chunk_text = text[start:end]
         
         # Try to find page number for this chunk
-        # Simple heuristic: use the page that contains the start position
-        char_count = 0
+        # Simple heuristic: use the page that contains the start position,
+        # or the last page for offsets past the end
         page_number = 1
-        for page in page_metadata:
-            char_count += page["char_count"]
-            if char_count >= start:
-                page_number = page["page_number"]
-                break
+        if page_metadata:
+            page_idx = min(bisect_left(page_ends, start), len(page_metadata) - 1)
+            page_number = page_metadata[page_idx]["page_number"]
         
         chunks.append({
             "text": chunk_text,
@@ -6,12 +6,203 @@ logging/audit file writing, and retry logic for failed verifications.
 """
 
 import re
-import json
+import sys
+import uuid
+import threading
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 
+import aiofiles
+import numpy as np
+import orjson
+
 from src.config import Config
+from src.types_ import RetrievedBatch
+
+try:
+    import hyperscan
+except ImportError:  # Optional accelerator; falls back to the re module
+    hyperscan = None
+
+try:
+    import msgpack
+except ImportError:  # Only needed for LOG_FORMAT=msgpack
+    msgpack = None
+
+# Bracket citations like "[3]" and case citations like "(2023) 5 SCC 123".
+# A str.find()-based scanner for "[n]" measured 2-3x slower than findall on
+# responses that cite passages, so the fallback scan stays on re. RE2
+# (google-re2) was 25-70x slower still through its Python bindings, and
+# neither pattern has nested quantifiers that could backtrack badly. The
+# two patterns are also kept apart: one alternation covering both scanned
+# 1.5-15x slower than two separate passes, as it loses the literal-prefix
+# search each pattern gets on its own. Both are ASCII-only (\d, \s),
+# matching the byte-level Hyperscan databases, so "[१२]" or a no-break
+# space in "(2023)\u00a05 SCC 123" is no citation on either path.
+_BRACKET_CITE_RE = re.compile(r'\[(\d+)\]', re.ASCII)
+_CASE_CITE_RE = re.compile(r'\(\d{4}\)\s+\d+\s+[A-Z]+\s+\d+', re.ASCII)
+
+
+def _compile_bracket_citation_db():
+    """Compile the Hyperscan block-mode database for [n] citations."""
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=[rb'\[\d+\]'],
+        ids=[0],
+        flags=[hyperscan.HS_FLAG_SOM_LEFTMOST]
+    )
+    return db
+
+
+def _compile_case_citation_db():
+    """Compile the Hyperscan block-mode database for case citations."""
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=[rb'\(\d{4}\)\s+\d+\s+[A-Z]+\s+\d+'],
+        ids=[1],
+        flags=[hyperscan.HS_FLAG_SOM_LEFTMOST]
+    )
+    return db
+
+
+_BRACKET_CITATION_DB = _compile_bracket_citation_db() if hyperscan else None
+_CASE_CITATION_DB = _compile_case_citation_db() if hyperscan else None
+# A Hyperscan database owns a single scratch space, so scans are serialized
+_BRACKET_CITATION_DB_LOCK = threading.Lock()
+_CASE_CITATION_DB_LOCK = threading.Lock()
+
+
+def _scan_bracket_citations(text: str) -> List[int]:
+    """
+    Extract the numbers of all [n] citations in text, in order of appearance.
+    
+    Uses Hyperscan when available, otherwise the re module. Numbers can
+    have any number of digits, so they may not fit in an int64.
+    
+    Args:
+        text: Text to scan
+    
+    Returns:
+        List of cited numbers (with repeats)
+    """
+    if _BRACKET_CITATION_DB is None:
+        return [int(num) for num in _BRACKET_CITE_RE.findall(text)]
+    
+    data = text.encode('utf-8')
+    numbers = []
+    
+    def on_match(_id, start, end, _flags, _context):
+        numbers.append(int(data[start + 1:end - 1]))
+    
+    with _BRACKET_CITATION_DB_LOCK:
+        _BRACKET_CITATION_DB.scan(data, match_event_handler=on_match)
+    return numbers
+
+
+def _scan_case_citations(text: str) -> List[str]:
+    """
+    Extract all case citations like "(2023) 5 SCC 123" in text, in order of appearance.
+    
+    Uses Hyperscan when available, otherwise the re module.
+    
+    Args:
+        text: Text to scan
+    
+    Returns:
+        List of citation strings (with repeats)
+    """
+    if _CASE_CITATION_DB is None:
+        return _CASE_CITE_RE.findall(text)
+    
+    data = text.encode('utf-8')
+    
+    # Hyperscan reports every end offset of the trailing \d+, in increasing
+    # order; the last one per start is the greedy match re returns. Matches
+    # cannot overlap (each holds a single "("), so starts stay in text order.
+    ends = {}
+    
+    def on_match(_id, start, end, _flags, _context):
+        ends[start] = end
+    
+    with _CASE_CITATION_DB_LOCK:
+        _CASE_CITATION_DB.scan(data, match_event_handler=on_match)
+    return [data[start:end].decode('utf-8') for start, end in ends.items()]
+
+
+def _validate_citations(cited: np.ndarray, num_retrieved: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split cited numbers into sorted, de-duplicated valid and invalid arrays.
+    
+    Written as a plain loop over arrays so numba can compile it.
+    
+    Args:
+        cited: int64 array of cited numbers
+        num_retrieved: Number of retrieved passages
+    
+    Returns:
+        Tuple of (valid, invalid) int64 arrays
+    """
+    seen = np.zeros(num_retrieved + 1, dtype=np.uint8)
+    invalid = np.empty(cited.size, dtype=np.int64)
+    num_invalid = 0
+    for num in cited:
+        if 1 <= num <= num_retrieved:
+            seen[num] = 1
+        else:
+            invalid[num_invalid] = num
+            num_invalid += 1
+    # seen is indexed by number, so valid comes out sorted without a sort
+    if num_invalid > 1:
+        return np.nonzero(seen)[0].astype(np.int64), np.unique(invalid[:num_invalid])
+    return np.nonzero(seen)[0].astype(np.int64), invalid[:num_invalid].copy()
+
+
+def _validate_citations_with_sets(cited: np.ndarray, num_retrieved: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pure-Python equivalent of _validate_citations for use without numba.
+    
+    Interpreted loops over numpy scalars are slow, so this works on plain
+    ints and de-duplicates with sets, sorting once at the end.
+    
+    Args:
+        cited: int64 array of cited numbers
+        num_retrieved: Number of retrieved passages
+    
+    Returns:
+        Tuple of (valid, invalid) int64 arrays
+    """
+    valid = set()
+    invalid = set()
+    for num in cited.tolist():
+        (valid if 1 <= num <= num_retrieved else invalid).add(num)
+    # Zero or one citation (the common case for invalid) needs no sort
+    return (
+        np.array(sorted(valid) if len(valid) > 1 else list(valid), dtype=np.int64),
+        np.array(sorted(invalid) if len(invalid) > 1 else list(invalid), dtype=np.int64)
+    )
+
+
+_citation_validator = None
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def _get_citation_validator():
+    """Return the numba-compiled validator, or the set-based one without numba."""
+    global _citation_validator
+    if _citation_validator is None:
+        try:
+            from numba import njit
+            # An explicit signature compiles (or loads from cache) right here
+            # instead of on the first call
+            _citation_validator = njit(
+                "Tuple((int64[::1], int64[::1]))(int64[::1], int64)", cache=True
+            )(_validate_citations)
+        except ImportError:
+            _citation_validator = _validate_citations_with_sets
+    return _citation_validator
 
 
 def verify_bracket_citations(text: str, num_retrieved: int) -> Dict[str, List[int]]:
@@ -25,24 +216,24 @@ def verify_bracket_citations(text: str, num_retrieved: int) -> Dict[str, List[in
     Returns:
         Dict with 'valid' and 'invalid' lists of citation numbers
     """
-    # Find all bracket citations [n]
-    citations = re.findall(r'\[(\d+)\]', text)
+    # Responses without any bracket (common in summaries) cannot cite
+    if '[' not in text:
+        return {"valid": [], "invalid": []}
     
-    valid = []
-    invalid = []
+    cited = _scan_bracket_citations(text)
     
-    for citation in citations:
-        num = int(citation)
-        if 1 <= num <= num_retrieved:
-            if num not in valid:
-                valid.append(num)
-        else:
-            if num not in invalid:
-                invalid.append(num)
+    # Numbers too large for an int64 cannot be valid; they sort after every
+    # other invalid number
+    overflow = []
+    if cited and max(cited) > _INT64_MAX:
+        overflow = sorted({num for num in cited if num > _INT64_MAX})
+        cited = [num for num in cited if num <= _INT64_MAX]
+    
+    valid, invalid = _get_citation_validator()(np.array(cited, dtype=np.int64), num_retrieved)
     
     return {
-        "valid": sorted(valid),
-        "invalid": sorted(invalid)
+        "valid": valid.tolist(),
+        "invalid": invalid.tolist() + overflow
     }
 
 
@@ -55,37 +246,63 @@ def detect_unverified_citations(text: str, retrieved_metadata: List[Dict]) -> Li
         retrieved_metadata: Metadata from retrieved documents
     
     Returns:
-        List of potentially unverified citations
+        List of potentially unverified citations, each listed once in order
+        of first appearance
     """
+    if '(' not in text:
+        return []
+    
     unverified = []
     
-    # Pattern for case citations like "(2023) 5 SCC 123"
-    citation_pattern = r'\(\d{4}\)\s+\d+\s+[A-Z]+\s+\d+'
-    found_citations = re.findall(citation_pattern, text)
-    
-    # Check if these citations match retrieved metadata
-    for citation in found_citations:
-        matched = False
-        for meta in retrieved_metadata:
-            if meta.get("citation") == citation:
-                matched = True
-                break
-        
-        if not matched:
+    # Check if these citations match retrieved metadata, once per distinct citation
+    known_citations = {meta.get("citation") for meta in retrieved_metadata}
+    seen = set()
+    for citation in _scan_case_citations(text):
+        if citation in seen:
+            continue
+        seen.add(citation)
+        if citation not in known_citations:
             unverified.append(citation)
     
     return unverified
 
 
+def snippet(text: str, max_len: int) -> str:
+    """
+    Get at most max_len characters of text for logging.
+    
+    Returns text itself, without copying, when it is already short enough.
+    
+    Args:
+        text: Text to shorten
+        max_len: Maximum length in characters
+    
+    Returns:
+        text, or its first max_len characters
+    """
+    return text if len(text) <= max_len else text[:max_len]
+
+
+def _truncate(text: str, max_len: int = 500) -> str:
+    """
+    Shorten a long log field to max_len characters plus an ellipsis.
+    
+    str slices are copies, so a log entry never keeps the full text alive.
+    """
+    return text[:max_len] + "..." if len(text) > max_len else text
+
+
 def create_log_entry(
     mode: str,
     user_input: str,
-    retrieved: List[Dict],
+    retrieved: RetrievedBatch,
     prompt: str,
     llm_response: str,
     verification: Dict,
     temperature: float,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    now: Optional[datetime] = None,
+    cache_hit: bool = False
 ) -> Dict:
     """
     Create a structured log entry for a request.
@@ -99,69 +316,187 @@ def create_log_entry(
         verification: Citation verification results
         temperature: Generation temperature used
         user_id: Optional user identifier
+        now: Request time, shared with the log file name; defaults to now
+        cache_hit: Whether the response was served from the semantic cache
     
     Returns:
         Dict with complete log entry
     """
-    # Truncate long fields
-    def truncate(text: str, max_len: int = 500) -> str:
-        return text[:max_len] + "..." if len(text) > max_len else text
-    
     # Extract metadata summaries
-    retrieved_summary = []
-    for doc in retrieved:
-        meta = doc.get("metadata", {})
-        retrieved_summary.append({
-            "id": doc.get("id"),
-            "source_file": meta.get("source_file"),
-            "page_number": meta.get("page_number"),
-            "chunk_index": meta.get("chunk_index"),
-            "case_name": meta.get("case_name"),
-            "distance": doc.get("distance")
-        })
+    retrieved_summary = [None] * len(retrieved)
+    for i, (doc_id, meta, distance) in enumerate(zip(retrieved.ids, retrieved.metadatas, retrieved.distances.tolist())):
+        meta_get = meta.get
+        retrieved_summary[i] = {
+            "id": doc_id,
+            "source_file": meta_get("source_file"),
+            "page_number": meta_get("page_number"),
+            "chunk_index": meta_get("chunk_index"),
+            "case_name": meta_get("case_name"),
+            "distance": distance
+        }
     
+    # Truncate long fields
+    resp_len = len(llm_response)
     log_entry = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": (now or datetime.now()).isoformat(),
         "user_id": user_id,
         "mode": mode,
-        "user_input": truncate(user_input, 1000),
+        "user_input": _truncate(user_input, 1000),
         "retrieved_count": len(retrieved),
         "retrieved_metadata": retrieved_summary,
-        "prompt": truncate(prompt, 2000),
+        "prompt": _truncate(prompt, 2000),
         "temperature": temperature,
-        "llm_response": truncate(llm_response, 2000),
+        "llm_response": llm_response[:2000] + "..." if resp_len > 2000 else llm_response,
         "verification": verification,
-        "full_response_length": len(llm_response)
+        "full_response_length": resp_len,
+        "cache_hit": cache_hit
     }
     
     return log_entry
 
 
-def write_log_file(log_entry: Dict, mode: str) -> Path:
+def log_file_path(mode: str, now: Optional[datetime] = None) -> Path:
     """
-    Write log entry to a JSON file.
+    Generate a unique log file path for a request.
+    
+    The path can be handed out before the log is written.
+    
+    Args:
+        mode: Request mode (for filename)
+        now: Request time; defaults to now
+    
+    Returns:
+        Path under Config.LOGS_DIR
+    """
+    timestamp = (now or datetime.now()).strftime("%Y%m%d_%H%M%S")
+    suffix = ".msgpack" if _msgpack_logs() else ".json"
+    return Config.LOGS_DIR / f"{mode}_{timestamp}_{uuid.uuid4().hex[:8]}{suffix}"
+
+
+# Set once the missing-msgpack fallback has been reported
+_MSGPACK_FALLBACK_WARNED = False
+
+
+def _msgpack_logs() -> bool:
+    """
+    Whether Config.LOG_FORMAT selects MessagePack and msgpack is installed.
+    
+    Falls back to JSON without msgpack, warning on the first call only.
+    """
+    global _MSGPACK_FALLBACK_WARNED
+    if Config.LOG_FORMAT != "msgpack":
+        return False
+    if msgpack is None:
+        if not _MSGPACK_FALLBACK_WARNED:
+            print("WARNING: LOG_FORMAT=msgpack requires the msgpack package; writing JSON logs")
+            _MSGPACK_FALLBACK_WARNED = True
+        return False
+    return True
+
+
+# Set once Config.ensure_directories() has run, so log writes skip the mkdir calls
+_DIRS_READY = False
+
+
+def _ensure_log_dirs() -> None:
+    """Create the project directories on the first log write only."""
+    global _DIRS_READY
+    if not _DIRS_READY:
+        Config.ensure_directories()
+        _DIRS_READY = True
+
+
+def write_log_file(
+    log_entry: Dict,
+    mode: str,
+    filepath: Optional[Path] = None,
+    now: Optional[datetime] = None
+) -> Path:
+    """
+    Write log entry to a JSON or, for .msgpack paths, MessagePack file.
     
     Args:
         log_entry: Log entry dict
         mode: Request mode (for filename)
+        filepath: Destination from log_file_path(); generated if omitted,
+                  in the format selected by Config.LOG_FORMAT
+        now: Request time used to name a generated file; defaults to now
     
     Returns:
         Path to the created log file
     """
-    Config.ensure_directories()
+    _ensure_log_dirs()
     
-    # Generate filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{mode}_{timestamp}.json"
-    filepath = Config.LOGS_DIR / filename
+    if filepath is None:
+        filepath = log_file_path(mode, now)
     
     # Write log file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(log_entry, f, indent=2, ensure_ascii=False)
+    with open(filepath, 'wb') as f:
+        f.write(_serialize_log_entry(log_entry, filepath))
+    
+    return filepath
+
+
+async def write_log_file_async(
+    log_entry: Dict,
+    mode: str,
+    filepath: Optional[Path] = None,
+    now: Optional[datetime] = None
+) -> Path:
+    """
+    Write log entry like write_log_file without blocking the event loop.
+    
+    Serialization runs on the loop (orjson is fast); the file is written
+    through aiofiles' thread pool.
+    
+    Args:
+        log_entry: Log entry dict
+        mode: Request mode (for filename)
+        filepath: Destination from log_file_path(); generated if omitted,
+                  in the format selected by Config.LOG_FORMAT
+        now: Request time used to name a generated file; defaults to now
+    
+    Returns:
+        Path to the created log file
+    """
+    _ensure_log_dirs()
+    
+    if filepath is None:
+        filepath = log_file_path(mode, now)
+    
+    data = _serialize_log_entry(log_entry, filepath)
+    async with aiofiles.open(filepath, 'wb') as f:
+        await f.write(data)
     
     return filepath
 
 
+def _serialize_log_entry(log_entry: Dict, filepath: Path) -> bytes:
+    """Encode a log entry as MessagePack for .msgpack paths, otherwise as indented JSON."""
+    if filepath.suffix == ".msgpack":
+        return msgpack.packb(log_entry, use_bin_type=True, default=str)
+    # orjson emits UTF-8 bytes, the equivalent of ensure_ascii=False
+    return orjson.dumps(log_entry, default=str, option=orjson.OPT_INDENT_2)
+
+
+def read_log_file(filepath: Path) -> Dict:
+    """
+    Read a log file written by write_log_file.
+    
+    Args:
+        filepath: Path to a .json or .msgpack log file
+    
+    Returns:
+        Log entry dict
+    """
+    data = Path(filepath).read_bytes()
+    if Path(filepath).suffix == ".msgpack":
+        if msgpack is None:
+            raise ImportError("Reading .msgpack logs requires the msgpack package")
+        return msgpack.unpackb(data, raw=False)
+    return orjson.loads(data)
+
+
 def should_retry_generation(verification: Dict) -> bool:
     """
     Determine if generation should be retried based on verification.
@@ -176,6 +511,18 @@ def should_retry_generation(verification: Dict) -> bool:
     return len(verification.get("invalid", [])) > 0
 
 
+@lru_cache(maxsize=256)
+def _retry_prefix(num_retrieved: int, invalid_citations: Tuple[int, ...]) -> str:
+    """Format the retry instruction for a set of invalid citations."""
+    return f"""
+CRITICAL CORRECTION REQUIRED:
+Your previous response contained invalid citations: {list(invalid_citations)}
+You MUST use ONLY bracket numbers from [1] to [{num_retrieved}].
+Do NOT use any other numbers in bracket citations.
+
+"""
+
+
 def build_retry_prompt(original_prompt: str, num_retrieved: int, invalid_citations: List[int]) -> str:
     """
     Build a stricter prompt for retry after citation verification failure.
@@ -188,13 +535,19 @@ def build_retry_prompt(original_prompt: str, num_retrieved: int, invalid_citatio
     Returns:
         Modified prompt with stricter instructions
     """
-    retry_instruction = f"""
-CRITICAL CORRECTION REQUIRED:
-Your previous response contained invalid citations: {invalid_citations}
-You MUST use ONLY bracket numbers from [1] to [{num_retrieved}].
-Do NOT use any other numbers in bracket citations.
+    # Insert retry instruction at the beginning
+    return _retry_prefix(num_retrieved, tuple(sorted(invalid_citations))) + original_prompt
 
-"""
+
+def main():
+    """Print log files given on the command line as indented JSON."""
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.verify_and_log LOG_FILE [LOG_FILE ...]")
+        sys.exit(1)
     
-    # Insert retry instruction at the beginning
-    return retry_instruction + original_prompt
+    for arg in sys.argv[1:]:
+        print(orjson.dumps(read_log_file(Path(arg)), option=orjson.OPT_INDENT_2).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Write-ahead audit log for Legal Assistant RAG Chatbot.
+
+Appends log entries to a single append-only file as length-prefixed
+MessagePack frames. Appends only reach the OS page cache; a committer
+thread makes them durable with one fdatasync per Config.LOG_COMMIT_MS
+window (group commit). read_wal() turns the file back into entries, and
+running this module prints them as JSON lines.
+"""
+
+import os
+import sys
+import time
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import msgpack
+import orjson
+
+from src.config import Config
+
+# fdatasync is not available on macOS/Windows
+_sync_file = getattr(os, "fdatasync", os.fsync)
+
+# Each frame is a big-endian uint32 payload length followed by the payload
+_FRAME_HEADER = struct.Struct(">I")
+
+
+class WALLogger:
+    """Append-only, group-committed MessagePack audit log."""
+
+    def __init__(self, path: Optional[Path] = None, commit_ms: float = None):
+        """
+        Initialize the WAL logger. The file is opened on the first append.
+
+        Args:
+            path: Log file. Defaults to Config.LOGS_DIR / "audit.wal".
+            commit_ms: Group commit window. Defaults to Config.LOG_COMMIT_MS.
+        """
+        self.path = Path(path) if path is not None else Config.LOGS_DIR / "audit.wal"
+        self.commit_ms = Config.LOG_COMMIT_MS if commit_ms is None else commit_ms
+
+        self._fd = None
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._committer = None
+
+    def _open(self) -> None:
+        """Open the log file for appending and start the committer thread."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._committer = threading.Thread(target=self._run, name="wal-commit", daemon=True)
+        self._committer.start()
+
+    def append(self, log_entry: Dict) -> Path:
+        """
+        Append a log entry.
+
+        Durability is eventual: the entry is on disk after the next group
+        commit, not when this returns.
+
+        Args:
+            log_entry: Log entry dict
+
+        Returns:
+            Path of the WAL file
+        """
+        payload = msgpack.packb(log_entry, use_bin_type=True, default=str)
+        frame = memoryview(_FRAME_HEADER.pack(len(payload)) + payload)
+
+        with self._lock:
+            if self._fd is None:
+                self._open()
+            while frame:
+                frame = frame[os.write(self._fd, frame):]
+
+        self._dirty.set()
+        return self.path
+
+    def commit(self) -> None:
+        """Sync all appended entries to disk now."""
+        with self._lock:
+            if self._fd is not None:
+                _sync_file(self._fd)
+
+    def close(self) -> None:
+        """Sync and close the log file and stop the committer thread."""
+        with self._lock:
+            if self._fd is None:
+                return
+            _sync_file(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        self._dirty.set()
+        self._committer.join()
+
+    def _run(self) -> None:
+        """Sync the file once per commit window while there are new appends."""
+        while True:
+            self._dirty.wait()
+            # Let the window fill up so one sync covers many appends
+            time.sleep(self.commit_ms / 1000)
+            self._dirty.clear()
+
+            with self._lock:
+                if self._fd is None:
+                    return
+                fd = self._fd
+            try:
+                _sync_file(fd)
+            except OSError as e:
+                print(f"ERROR: Could not sync audit WAL: {e}")
+
+
+def read_wal(path: Path) -> Iterator[Dict]:
+    """
+    Read the entries of a WAL file in append order.
+
+    A frame cut short by a crash mid-append ends the log.
+
+    Args:
+        path: WAL file
+
+    Yields:
+        Log entry dicts
+    """
+    data = Path(path).read_bytes()
+    offset = 0
+    while offset + _FRAME_HEADER.size <= len(data):
+        (length,) = _FRAME_HEADER.unpack_from(data, offset)
+        offset += _FRAME_HEADER.size
+        if offset + length > len(data):
+            break
+        yield msgpack.unpackb(data[offset:offset + length], raw=False)
+        offset += length
+
+
+# Global instance for reuse
+_wal_logger_instance = None
+
+
+def get_wal_logger() -> WALLogger:
+    """
+    Get or create the global WAL logger instance.
+
+    Returns:
+        WALLogger instance
+    """
+    global _wal_logger_instance
+    if _wal_logger_instance is None:
+        _wal_logger_instance = WALLogger()
+    return _wal_logger_instance
+
+
+def main():
+    """Print a WAL file (default Config.LOGS_DIR/audit.wal) as JSON lines."""
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else Config.LOGS_DIR / "audit.wal"
+    for log_entry in read_wal(path):
+        print(orjson.dumps(log_entry).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,20 +9,58 @@ Tests cover:
 - LLM client
 """
 
+import asyncio
+import json
 import pytest
+import numpy as np
 from fastapi.testclient import TestClient
 from pathlib import Path
 
 # Import app
 from src.app_features import app
+from src import verify_and_log
 from src.verify_and_log import verify_bracket_citations
+from src.prompt_templates import build_research_prompt
+from src.types_ import RetrievedBatch, LSHIndex, bump_index_version, quantize_int8
+from src.config import Config
+from src.log_writer import LogWriter
+from src.semantic_cache import SemanticCache
+from src import embeddings_
+from src.embeddings_ import BatchingEmbedder, EmbeddingModel
 
 
-# Test client
-client = TestClient(app)
+def _not_loaded_in_tests():
+    """Stand-in for the model, retriever, and LLM client loaders."""
+    raise RuntimeError("not loaded in tests")
 
 
-def test_root_endpoint():
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    """
+    Test client shared by all tests; runs the app's startup and shutdown once.
+    
+    The Chroma, log, and data directories point at a temporary directory and
+    no models are loaded, so the tests leave the working tree untouched.
+    """
+    from src import app_features
+    
+    root = tmp_path_factory.mktemp("app")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Config, "CHROMA_DB_DIR", str(root / "chroma_db"))
+        mp.setattr(Config, "INDEX_VERSION_PATH", str(root / "chroma_db" / "index_version"))
+        mp.setattr(Config, "LOGS_DIR", root / "logs")
+        mp.setattr(Config, "RAW_DATA_DIR", root / "data" / "raw")
+        mp.setattr(Config, "ACTS_DIR", root / "data" / "acts")
+        mp.setattr(Config, "JUDGMENTS_DIR", root / "data" / "judgments")
+        for loader in ("get_embedding_model", "get_batching_embedder", "get_semantic_cache",
+                       "get_retriever", "get_llm_client"):
+            mp.setattr(app_features, loader, _not_loaded_in_tests)
+        
+        with TestClient(app) as test_client:
+            yield test_client
+
+
+def test_root_endpoint(client):
     """Test root endpoint returns API information."""
     response = client.get("/")
     assert response.status_code == 200
@@ -31,13 +69,13 @@ def test_root_endpoint():
     assert "endpoints" in data
 
 
-def test_research_endpoint_missing_query():
+def test_research_endpoint_missing_query(client):
     """Test research endpoint with missing query."""
     response = client.post("/research", json={})
     assert response.status_code == 422  # Validation error
 
 
-def test_judgment_endpoint_invalid_mode():
+def test_judgment_endpoint_invalid_mode(client):
     """Test judgment endpoint with invalid mode."""
     response = client.post("/judgment", json={
         "facts": "Test facts",
@@ -46,7 +84,7 @@ def test_judgment_endpoint_invalid_mode():
     assert response.status_code == 400
 
 
-def test_summarize_endpoint_missing_input():
+def test_summarize_endpoint_missing_input(client):
     """Test summarize endpoint with missing input."""
     response = client.post("/summarize", json={})
     assert response.status_code == 400
@@ -79,6 +117,500 @@ def test_citation_verification_no_citations():
     assert result["invalid"] == []
 
 
+def test_citation_verification_dedupes_and_sorts(monkeypatch):
+    """Test repeated and out-of-order citations, with and without numba."""
+    text = "[3] then [1], [3] again, [9], [0], [99999999999999999999] and [9]."
+    expected = {"valid": [1, 3], "invalid": [0, 9, 99999999999999999999]}
+    assert verify_bracket_citations(text, num_retrieved=3) == expected
+    
+    monkeypatch.setattr(verify_and_log, "_citation_validator", verify_and_log._validate_citations)
+    assert verify_bracket_citations(text, num_retrieved=3) == expected
+    
+    monkeypatch.setattr(verify_and_log, "_citation_validator", verify_and_log._validate_citations_with_sets)
+    assert verify_bracket_citations(text, num_retrieved=3) == expected
+    assert verify_bracket_citations("", num_retrieved=3) == {"valid": [], "invalid": []}
+
+
+def test_citation_scan_matches_re_fallback(monkeypatch):
+    """Test the accelerated citation scan agrees with the re fallback."""
+    text = "See [1], [12] and [3]; not [a], [ 4 ] or [\u0967\u0968]. Again [1][250]."
+    scanned = verify_and_log._scan_bracket_citations(text)
+    
+    monkeypatch.setattr(verify_and_log, "_BRACKET_CITATION_DB", None)
+    assert verify_and_log._scan_bracket_citations(text) == scanned == [1, 12, 3, 1, 250]
+
+
+def test_case_citation_scan_matches_re_fallback(monkeypatch):
+    """Test the accelerated case citation scan returns re's greedy, in-order matches."""
+    text = "(2023) 5 SCC 123 and (2019)  12 AIR 7; (2023) 5 SCC 123 again. Not (202) 1 SCC 2 or (2023)\u00a05 SCC 123."
+    scanned = verify_and_log._scan_case_citations(text)
+    
+    monkeypatch.setattr(verify_and_log, "_CASE_CITATION_DB", None)
+    assert verify_and_log._scan_case_citations(text) == scanned == [
+        "(2023) 5 SCC 123", "(2019)  12 AIR 7", "(2023) 5 SCC 123"
+    ]
+
+
+def test_research_prompt_cached_by_doc_ids(monkeypatch, tmp_path):
+    """Test prompts are reused for the same query and doc IDs until the index changes."""
+    retrieved = RetrievedBatch(
+        ids=["ipc_1"],
+        documents=["Section 302 text"],
+        metadatas=[{"source_file": "IPC.pdf"}],
+        distances=np.array([0.1], dtype=np.float32)
+    )
+    first = build_research_prompt("Section 302?", retrieved)
+    
+    assert build_research_prompt("Section 302?", retrieved) is first
+    
+    monkeypatch.setattr(Config, "INDEX_VERSION_PATH", str(tmp_path / "index_version"))
+    bump_index_version()
+    rebuilt = build_research_prompt("Section 302?", retrieved)
+    assert rebuilt == first and rebuilt is not first
+
+
+def test_semantic_cache_hit_on_near_duplicate():
+    """Test semantic cache returns a response for a near-identical embedding."""
+    cache = SemanticCache(dim=4, tau=0.95, max_size=8, ttl=300)
+    cache.add([1.0, 0.0, 0.0, 0.0], {"answer": "cached"}, ("research",))
+    
+    assert cache.lookup([0.99, 0.05, 0.0, 0.0], ("research",)) == {"answer": "cached"}
+    assert cache.lookup([0.0, 1.0, 0.0, 0.0], ("research",)) is None
+    assert cache.lookup([1.0, 0.0, 0.0, 0.0], ("judgment",)) is None
+
+
+def test_semantic_cache_lru_eviction_and_ttl():
+    """Test semantic cache evicts least-recently-used and expired entries."""
+    cache = SemanticCache(dim=4, tau=0.95, max_size=2, ttl=300)
+    cache.add([1.0, 0.0, 0.0, 0.0], {"answer": "a"})
+    cache.add([0.0, 1.0, 0.0, 0.0], {"answer": "b"})
+    cache.lookup([1.0, 0.0, 0.0, 0.0])
+    cache.add([0.0, 0.0, 1.0, 0.0], {"answer": "c"})
+    
+    assert len(cache) == 2
+    assert cache.lookup([1.0, 0.0, 0.0, 0.0]) == {"answer": "a"}
+    assert cache.lookup([0.0, 1.0, 0.0, 0.0]) is None
+    
+    cache.ttl = 0
+    assert cache.lookup([0.0, 0.0, 1.0, 0.0]) is None
+    assert len(cache) == 1
+
+
+def test_lsh_index_finds_exact_vector():
+    """Test LSH index returns the stored entry for an identical query."""
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((200, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    for min_entries in (0, 1000):  # LSH buckets, then exact matrix scan
+        index = LSHIndex(dim=384, num_tables=8, bits=12, min_entries=min_entries)
+        for i, vec in enumerate(vectors):
+            index.add(i, vec)
+        
+        entry_id, score = index.query(vectors[17], tau=0.95)
+        assert entry_id == 17
+        assert score == pytest.approx(1.0, abs=1e-2)
+        
+        index.remove(17)
+        assert len(index) == 199
+        assert index.query(vectors[17], tau=0.95) is None
+        assert index.query(vectors[199], tau=0.95)[0] == 199
+
+
+def test_quantize_int8_round_trip():
+    """Test int8 quantization preserves cosine similarity closely."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((10, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    codes, scales = quantize_int8(vectors)
+    assert codes.dtype == np.int8
+    
+    restored = codes.astype(np.float32) * scales[:, None]
+    cosine = (restored * vectors).sum(axis=1) / np.linalg.norm(restored, axis=1)
+    assert np.all(cosine > 0.999)
+
+
+class FakeSentenceTransformer:
+    """Stand-in for SentenceTransformer that records what it encodes."""
+    
+    def __init__(self, *args, **kwargs):
+        self.encoded = []
+    
+    def get_sentence_embedding_dimension(self):
+        return 2
+    
+    def encode(self, texts, **kwargs):
+        self.encoded.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_embedding_cache_skips_repeated_texts(monkeypatch):
+    """Test repeated texts are served from the embedding cache, not re-encoded."""
+    monkeypatch.setattr(embeddings_, "SentenceTransformer", FakeSentenceTransformer)
+    model = EmbeddingModel("fake")
+    
+    first = model.embed_query("section 302")
+    result = model.embed_texts(["a", "section 302", "bb"], show_progress=False)
+    
+    assert model.model.encoded == [["section 302"], ["a", "bb"]]
+    assert np.array_equal(result[1], first)
+    assert result[:, 0].tolist() == [1.0, 11.0, 2.0]
+
+
+def test_batching_embedder_coalesces_concurrent_queries():
+    """Test concurrent query embeddings are encoded in a single batch."""
+    class FakeModel:
+        def __init__(self):
+            self.batches = []
+        
+        def embed_texts(self, texts, batch_size=32, show_progress=True):
+            self.batches.append(list(texts))
+            return np.array([[float(len(t)), 0.0] for t in texts], dtype=np.float32)
+    
+    model = FakeModel()
+    embedder = BatchingEmbedder(model=model, flush_ms=20, batch_max=8)
+    
+    async def run():
+        return await asyncio.gather(*(embedder.embed_query("q" * n) for n in range(1, 6)))
+    
+    results = asyncio.run(run())
+    
+    assert model.batches == [["q", "qq", "qqq", "qqqq", "qqqqq"]]
+    assert [r[0] for r in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_log_writer_appends_ndjson_batches(monkeypatch, tmp_path):
+    """Test queued log entries are appended as JSON lines to the mode's daily file."""
+    monkeypatch.setattr(Config, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(Config, "ensure_directories", classmethod(lambda cls: None))
+    writer = LogWriter(flush_ms=5, batch_max=2)
+    
+    async def run():
+        paths = [await writer.enqueue({"n": i}, "research") for i in range(3)]
+        await writer.flush()
+        return paths
+    
+    paths = asyncio.run(run())
+    
+    assert len(set(paths)) == 1 and paths[0].parent == tmp_path
+    lines = paths[0].read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["n"] for line in lines] == [0, 1, 2]
+
+
+def test_log_writer_keeps_entries_queued_on_an_ended_loop(monkeypatch, tmp_path):
+    """Test entries left queued when an event loop ends are written on the next loop."""
+    monkeypatch.setattr(Config, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(Config, "ensure_directories", classmethod(lambda cls: None))
+    writer = LogWriter(flush_ms=5, batch_max=2)
+    
+    async def enqueue_only():
+        return await writer.enqueue({"n": 0}, "research")
+    
+    async def enqueue_and_flush():
+        await writer.enqueue({"n": 1}, "research")
+        await writer.flush()
+    
+    path = asyncio.run(enqueue_only())
+    asyncio.run(enqueue_and_flush())
+    
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["n"] for line in lines] == [0, 1]
+
+
+def test_wal_logger_round_trips_entries(tmp_path):
+    """Test WAL entries are read back in order and a torn last frame is ignored."""
+    pytest.importorskip("msgpack")
+    from src.wal_logger import WALLogger, read_wal
+    
+    wal = WALLogger(path=tmp_path / "audit.wal", commit_ms=1)
+    for i in range(3):
+        wal.append({"n": i, "mode": "research"})
+    wal.close()
+    
+    with open(wal.path, "ab") as f:
+        f.write(b"\x00\x00\x01\x00partial")
+    
+    assert [entry["n"] for entry in read_wal(wal.path)] == [0, 1, 2]
+
+
+class _StubEmbeddingModel:
+    """Deterministic stand-in for the embedding model in ingestion tests."""
+    
+    def __init__(self):
+        self.texts = []
+    
+    def embed_texts(self, texts, batch_size=32, show_progress=False):
+        self.texts.extend(texts)
+        rng = np.random.default_rng(len(self.texts))
+        vectors = rng.standard_normal((len(texts), 8)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _write_pdf(path: Path, text: str) -> None:
+    """Write a one-page PDF containing text."""
+    import pymupdf
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = pymupdf.open()
+    doc.new_page().insert_textbox(pymupdf.Rect(36, 36, 560, 800), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+@pytest.fixture
+def ingestor(monkeypatch, tmp_path):
+    """LegalDocumentIngestor on a temporary Chroma directory with a stub embedder."""
+    from src import ingest
+    
+    chroma_dir = tmp_path / "chroma"
+    monkeypatch.setattr(Config, "CHROMA_DB_DIR", str(chroma_dir))
+    monkeypatch.setattr(Config, "CHUNK_EMBED_CACHE_PATH", str(chroma_dir / "chunk_embeddings.sqlite3"))
+    monkeypatch.setattr(Config, "INGEST_INDEX_PATH", str(chroma_dir / "ingest_index.sqlite3"))
+    monkeypatch.setattr(Config, "INDEX_VERSION_PATH", str(chroma_dir / "index_version"))
+    monkeypatch.setattr(Config, "ensure_directories", classmethod(lambda cls: chroma_dir.mkdir(exist_ok=True)))
+    monkeypatch.setattr(Config, "INGEST_WORKERS", 2)
+    
+    model = _StubEmbeddingModel()
+    monkeypatch.setattr(ingest, "get_embedding_model", lambda: model)
+    
+    ingestor = ingest.LegalDocumentIngestor()
+    ingestor.stub_model = model
+    return ingestor
+
+
+def _judgment_text(title: str) -> str:
+    """Enough text for a few chunks of a judgment PDF."""
+    return f"IN THE SUPREME COURT OF INDIA\n{title}\n" + " ".join(
+        f"Section {i} of the Indian Penal Code applies to this appeal." for i in range(60)
+    )
+
+
+def test_ingest_same_stem_pdfs_in_subdirectories(ingestor, tmp_path):
+    """Test PDFs sharing a file name in different folders get distinct chunk IDs."""
+    directory = tmp_path / "judgments"
+    _write_pdf(directory / "2023" / "x.pdf", _judgment_text("State v. A"))
+    _write_pdf(directory / "2024" / "x.pdf", _judgment_text("State v. B"))
+    
+    stats = ingestor.ingest_directory(directory, "judgment")
+    
+    ids = ingestor.collection.get()["ids"]
+    assert stats["files"] == 2 and stats["chunks"] == len(ids) > 2
+    assert "2023/x_0" in ids and "2024/x_0" in ids
+
+
+def test_ingest_marks_pdfs_without_text_processed(ingestor, tmp_path):
+    """Test a PDF yielding no chunks is recorded with 0 chunks and skipped on rerun."""
+    from src.ingest import _file_sha1
+    
+    directory = tmp_path / "judgments"
+    _write_pdf(directory / "blank.pdf", "")
+    
+    assert ingestor.ingest_directory(directory, "judgment")["files"] == 0
+    assert ingestor._file_index.chunk_count(_file_sha1(directory / "blank.pdf"), directory / "blank.pdf") == 0
+    
+    stats = ingestor.ingest_directory(directory, "judgment")
+    assert stats["files"] == 0 and stats["total_files"] == 1 and stats["chunks"] == 0
+
+
+def _record_upserts(monkeypatch, ingestor):
+    """Record the chunk IDs of every upsert the ingestor makes."""
+    upserts = []
+    upsert = ingestor.collection.upsert
+    
+    def recording_upsert(**batch):
+        upserts.append(batch["ids"])
+        upsert(**batch)
+    
+    monkeypatch.setattr(ingestor.collection, "upsert", recording_upsert)
+    return upserts
+
+
+def test_ingest_batches_chunks_of_several_pdfs(monkeypatch, ingestor, tmp_path):
+    """Test chunks of several PDFs are embedded and upserted together."""
+    monkeypatch.setattr(Config, "UPSERT_BATCH_SIZE", 1000)
+    upserts = _record_upserts(monkeypatch, ingestor)
+    directory = tmp_path / "judgments"
+    for name in ("a", "b", "c"):
+        _write_pdf(directory / f"{name}.pdf", _judgment_text(f"State v. {name.upper()}"))
+    
+    stats = ingestor.ingest_directory(directory, "judgment")
+    
+    assert stats["files"] == 3
+    assert len(upserts) == 1
+    assert {chunk_id.split("_")[0] for chunk_id in upserts[0]} == {"a", "b", "c"}
+    assert ingestor.collection.count() == stats["chunks"]
+
+
+def test_ingest_failed_upsert_leaves_pdfs_unprocessed(monkeypatch, ingestor, tmp_path):
+    """Test PDFs whose upsert fails are not counted or recorded, and are retried next run."""
+    directory = tmp_path / "judgments"
+    _write_pdf(directory / "a.pdf", _judgment_text("State v. A"))
+    
+    def failing_upsert(**batch):
+        raise RuntimeError("disk full")
+    
+    with monkeypatch.context() as mp:
+        mp.setattr(ingestor.collection, "upsert", failing_upsert)
+        stats = ingestor.ingest_directory(directory, "judgment")
+    assert stats["files"] == 0 and stats["chunks"] == 0
+    
+    stats = ingestor.ingest_directory(directory, "judgment")
+    assert stats["files"] == 1 and stats["chunks"] == ingestor.collection.count() > 0
+
+
+def test_ingest_skips_unchanged_pdfs_until_settings_change(monkeypatch, ingestor, tmp_path):
+    """Test unchanged PDFs are skipped on rerun and re-ingested after a chunking change."""
+    from src.ingest import LegalDocumentIngestor
+    
+    directory = tmp_path / "judgments"
+    _write_pdf(directory / "a.pdf", _judgment_text("State v. A"))
+    first = ingestor.ingest_directory(directory, "judgment")
+    embedded = len(ingestor.stub_model.texts)
+    
+    upserts = _record_upserts(monkeypatch, ingestor)
+    assert ingestor.ingest_directory(directory, "judgment") == first
+    assert upserts == [] and len(ingestor.stub_model.texts) == embedded
+    
+    monkeypatch.setattr(Config, "CHUNK_SIZE", Config.CHUNK_SIZE // 2)
+    rechunked = LegalDocumentIngestor().ingest_directory(directory, "judgment")
+    assert rechunked["files"] == 1 and rechunked["chunks"] > first["chunks"]
+
+
+def test_ingest_reuses_cached_chunk_embeddings(monkeypatch, ingestor, tmp_path):
+    """Test chunk texts embedded in an earlier run are not embedded again."""
+    from src.ingest import LegalDocumentIngestor
+    
+    directory = tmp_path / "judgments"
+    _write_pdf(directory / "a.pdf", _judgment_text("State v. A"))
+    ingestor.ingest_directory(directory, "judgment")
+    embedded = len(ingestor.stub_model.texts)
+    
+    # A fresh processed-file index forces the PDF through extraction again
+    monkeypatch.setattr(Config, "INGEST_INDEX_PATH", str(tmp_path / "fresh_index.sqlite3"))
+    stats = LegalDocumentIngestor().ingest_directory(directory, "judgment")
+    
+    assert stats["files"] == 1 and stats["chunks"] > 0
+    assert len(ingestor.stub_model.texts) == embedded
+
+
+def test_pdf_extraction_ocrs_only_scanned_pages(monkeypatch, tmp_path):
+    """Test image-only pages are OCRed, text pages are not, and empty PDFs are skipped early."""
+    import pymupdf
+    from src import utils
+    
+    ocred = []
+    
+    def fake_ocr(pdf_path, page_num, dpi=None):
+        ocred.append((pdf_path.name, page_num))
+        return "OCR text of the scanned page"
+    
+    monkeypatch.setattr(utils, "_ocr_page", fake_ocr)
+    monkeypatch.setattr(Config, "OCR_WORKERS", 1)
+    
+    mixed = tmp_path / "mixed.pdf"
+    doc = pymupdf.open()
+    doc.new_page().insert_textbox(pymupdf.Rect(36, 36, 560, 800), _judgment_text("State v. A"), fontsize=9)
+    scan = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 16, 16), False)
+    doc.new_page().insert_image(pymupdf.Rect(36, 36, 300, 300), pixmap=scan)
+    doc.save(mixed)
+    doc.close()
+    
+    blank = tmp_path / "blank.pdf"
+    doc = pymupdf.open()
+    for _ in range(5):
+        doc.new_page()
+    doc.save(blank)
+    doc.close()
+    
+    text, pages = utils.extract_text_from_pdf(mixed)
+    assert ocred == [("mixed.pdf", 2)]
+    assert "State v. A" in text and pages[1]["text"] == "OCR text of the scanned page"
+    
+    assert utils.extract_text_from_pdf(blank) == ("", [])
+    assert ocred == [("mixed.pdf", 2)]
+
+
+class _FakeResponse:
+    """Minimal requests.Response stand-in for LLM client tests."""
+    
+    status_code = 200
+    text = ""
+    
+    def json(self):
+        return {"candidates": [{"content": {"parts": [{"text": "Answer [1]"}]}}]}
+
+
+def test_llm_client_caches_deterministic_responses_on_disk(monkeypatch, tmp_path):
+    """Test temperature 0 responses are served from the disk cache, across clients."""
+    from src.llm_client import GoogleAIClient
+    
+    monkeypatch.setattr(Config, "GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "GOOGLE_AI_ENDPOINT", "https://example.invalid/generate")
+    monkeypatch.setattr(Config, "LLM_CACHE_DIR", str(tmp_path / "llm_cache"))
+    posts = []
+    
+    def fake_post(self, url, **kwargs):
+        posts.append(kwargs["json"]["generationConfig"]["temperature"])
+        return _FakeResponse()
+    
+    monkeypatch.setattr("requests.Session.post", fake_post)
+    
+    client = GoogleAIClient()
+    adapter = client.session.get_adapter("https://example.invalid/generate")
+    assert adapter.max_retries.total == Config.MAX_RETRIES
+    
+    assert client.generate("prompt")["text"] == "Answer [1]"
+    assert client.generate("prompt")["text"] == "Answer [1]"
+    assert GoogleAIClient().generate("prompt")["text"] == "Answer [1]"
+    assert posts == [0.0]
+    
+    client.generate("prompt", temperature=0.5)
+    client.generate("prompt", temperature=0.5)
+    assert posts == [0.0, 0.5, 0.5]
+
+
+def test_retrieve_cached_reuses_results_until_index_changes(monkeypatch, tmp_path):
+    """Test one ChromaDB query serves a signature until the index version changes."""
+    import threading
+    from collections import OrderedDict
+    from src.retriever import LegalRetriever
+    
+    monkeypatch.setattr(Config, "INDEX_VERSION_PATH", str(tmp_path / "index_version"))
+    monkeypatch.setattr(Config, "RETRIEVAL_CACHE_SIZE", 8)
+    
+    class FakeCollection:
+        def __init__(self):
+            self.queries = 0
+        
+        def query(self, **kwargs):
+            self.queries += 1
+            return {
+                "ids": [["ipc_1"]],
+                "documents": [["Section 302 text"]],
+                "metadatas": [[{"source_file": "IPC.pdf"}]],
+                "distances": [[0.1]]
+            }
+    
+    # Skip __init__, which opens the persistent Chroma collection
+    retriever = object.__new__(LegalRetriever)
+    retriever.collection = FakeCollection()
+    retriever._signer = LSHIndex(8, num_tables=1, bits=16)
+    retriever._cache = OrderedDict()
+    retriever._cache_lock = threading.Lock()
+    
+    embedding = np.ones(8, dtype=np.float32) / np.sqrt(8)
+    first = retriever.retrieve_cached("Section 302?", top_k=1, query_embedding=embedding)
+    again = retriever.retrieve_cached("What is Section 302?", top_k=1, query_embedding=embedding)
+    assert again is first and retriever.collection.queries == 1
+    
+    retriever.retrieve_cached("Section 302?", top_k=2, query_embedding=embedding)
+    assert retriever.collection.queries == 2
+    
+    bump_index_version()
+    assert retriever.retrieve_cached("Section 302?", top_k=1, query_embedding=embedding) is not first
+    assert retriever.collection.queries == 3
+
+
 # Add more integration tests as needed
 # These would require a populated ChromaDB and valid API credentials
 